@@ -0,0 +1,91 @@
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+from pyarrow import feather
+
+from snapshot_cache import CACHE_DIR, safe_name
+
+BAR_STORE_DIR = os.environ.get("BAR_STORE_DIR", os.path.join(CACHE_DIR, "bars"))
+
+
+@dataclass
+class BarStore:
+    """Append-only OHLCV bars per (symbol, interval) kept in memory-mapped Arrow files."""
+
+    directory: str = BAR_STORE_DIR
+    # bars are not re-fetched more often than this
+    refresh_seconds: int = 15 * 60
+
+    def path(self, symbol: str, interval: int) -> Path:
+        return Path(self.directory, safe_name(symbol), f"{interval}.arrow")
+
+    def read(self, symbol: str, interval: int) -> Tuple[Optional[pd.DataFrame], Optional[pd.Timestamp]]:
+        """Stored bars and the start date they were originally requested from."""
+        path = self.path(symbol, interval)
+        try:
+            table = feather.read_table(path, memory_map=True)
+        except (FileNotFoundError, OSError, pa.ArrowInvalid):
+            return None, None
+        metadata = table.schema.metadata or {}
+        return table.to_pandas(), pd.Timestamp(metadata.get(b"start_date", b"2100-01-01").decode())
+
+    def write(self, bars: pd.DataFrame, symbol: str, interval: int, start_date: pd.Timestamp) -> None:
+        path = self.path(symbol, interval)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            table = pa.Table.from_pandas(bars)
+            table = table.replace_schema_metadata(
+                {**(table.schema.metadata or {}), b"start_date": start_date.strftime("%Y-%m-%d").encode()}
+            )
+            # uncompressed so reads can map the file instead of decoding it
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as error:
+            logging.warning(f"Failed to store bars {symbol} {interval}: {error}")
+            tmp_path.unlink(missing_ok=True)
+
+    def is_fresh(self, symbol: str, interval: int) -> bool:
+        try:
+            return time.time() - self.path(symbol, interval).stat().st_mtime < self.refresh_seconds
+        except FileNotFoundError:
+            return False
+
+    def load(self, symbol: str, interval: int, start_date: str) -> pd.DataFrame:
+        from openbb_terminal.stocks import stocks_helper
+
+        stored, stored_from = self.read(symbol, interval)
+        start = pd.Timestamp(start_date)
+
+        if stored is None or stored.empty or stored_from > start:
+            logging.info(f"Loading {symbol} {interval} bars from {start_date}...")
+            bars = stocks_helper.load(symbol, interval=interval, start_date=start_date)
+            self.write(bars, symbol, interval, start)
+        elif self.is_fresh(symbol, interval):
+            bars = stored
+        else:
+            # re-fetch the last stored day, its final bar may have been partial
+            last_date = stored.index[-1].strftime("%Y-%m-%d")
+            logging.info(f"Appending {symbol} {interval} bars from {last_date}...")
+            try:
+                new_bars = stocks_helper.load(symbol, interval=interval, start_date=last_date)
+            except Exception as error:
+                logging.warning(f"Failed to update bars {symbol} {interval}: {error}")
+                new_bars = None
+
+            if new_bars is None or new_bars.empty:
+                bars = stored
+                os.utime(self.path(symbol, interval))
+            else:
+                bars = pd.concat([stored[stored.index < new_bars.index[0]], new_bars])
+                self.write(bars, symbol, interval, stored_from)
+
+        index = bars.index.tz_localize(None) if bars.index.tz is not None else bars.index
+        return bars[index >= start]
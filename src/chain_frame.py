@@ -0,0 +1,125 @@
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from strike_ladder import StrikeLadder
+
+OPTION_TYPES = ["call", "put"]
+FLOAT32_COLUMNS = ["lastPrice", "bid", "ask", "impliedVolatility"]
+INT_COLUMNS = ["openInterest", "volume"]
+
+
+class ChainFrame:
+    """Option chain sorted by (expiration, optionType, strike) with O(1) slices per expiration and type.
+
+    optionType and expiration are stored as categoricals and prices, volumes and open interest
+    are downcast, strikes stay float64 so they compare exactly against the price levels.
+    """
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self.expirations: List[str] = list(frame["expiration"].cat.categories)
+        self._expiration_codes = {expiration: code for code, expiration in enumerate(self.expirations)}
+        self._type_codes = frame["optionType"].cat.codes.to_numpy()
+        self._strikes = frame["strike"].to_numpy()
+
+        # rows of expiration e and type t are frame.iloc[starts[2e + t] : starts[2e + t + 1]]
+        block_keys = frame["expiration"].cat.codes.to_numpy() * len(OPTION_TYPES) + self._type_codes
+        self._starts = np.searchsorted(block_keys, np.arange(len(self.expirations) * len(OPTION_TYPES) + 1))
+        self._sub_chains: Dict[str, "ChainFrame"] = {}
+        self._ladder: Optional[StrikeLadder] = None
+        self._expiration_totals: Optional[pd.DataFrame] = None
+
+    @classmethod
+    def from_frame(cls, chain: pd.DataFrame) -> "ChainFrame":
+        chain = chain.copy()
+        chain["optionType"] = pd.Categorical(chain["optionType"], categories=OPTION_TYPES)
+        chain["expiration"] = pd.Categorical(chain["expiration"], categories=sorted(chain["expiration"].unique()))
+        chain["strike"] = chain["strike"].astype(float)
+        for column in FLOAT32_COLUMNS:
+            if column in chain:
+                chain[column] = chain[column].astype(np.float32)
+        for column in INT_COLUMNS:
+            if column in chain:
+                chain[column] = pd.to_numeric(chain[column].fillna(0), downcast="integer")
+
+        chain = chain.sort_values(by=["expiration", "optionType", "strike"], kind="stable")
+        return cls(chain.reset_index(drop=True))
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _block(self, expiration: str, option_type: Optional[str] = None) -> slice:
+        if expiration not in self._expiration_codes:
+            return slice(0, 0)
+        key = self._expiration_codes[expiration] * len(OPTION_TYPES)
+        if option_type is None:
+            return slice(self._starts[key], self._starts[key + len(OPTION_TYPES)])
+        key += OPTION_TYPES.index(option_type)
+        return slice(self._starts[key], self._starts[key + 1])
+
+    def slice(self, expiration: Optional[str] = None, option_type: Optional[str] = None) -> pd.DataFrame:
+        if expiration is not None:
+            return self.frame.iloc[self._block(expiration, option_type)]
+        if option_type is not None:
+            return self.frame[self._type_codes == OPTION_TYPES.index(option_type)]
+        return self.frame
+
+    def for_expiration(self, expiration: str) -> "ChainFrame":
+        if expiration not in self._sub_chains:
+            frame = self.slice(expiration).copy()
+            frame["expiration"] = frame["expiration"].cat.set_categories([expiration])
+            self._sub_chains[expiration] = ChainFrame(frame.reset_index(drop=True))
+        return self._sub_chains[expiration]
+
+    def strike_window(
+        self,
+        min_strike: float,
+        max_strike: float,
+        expiration: Optional[str] = None,
+        option_type: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """Rows with min_strike <= strike <= max_strike, found by binary search inside each block."""
+        expirations = self.expirations if expiration is None else [expiration]
+        option_types = OPTION_TYPES if option_type is None else [option_type]
+
+        positions = []
+        for block_expiration in expirations:
+            for block_type in option_types:
+                block = self._block(block_expiration, block_type)
+                strikes = self._strikes[block]
+                lower = np.searchsorted(strikes, min_strike, side="left")
+                upper = np.searchsorted(strikes, max_strike, side="right")
+                positions.append(np.arange(block.start + lower, block.start + upper))
+
+        return self.frame.iloc[np.concatenate(positions) if positions else []]
+
+    def expiration_totals(self) -> pd.DataFrame:
+        """Volume and open interest per expiration and type (volume_call, ..., openInterest_put), built on first use."""
+        if self._expiration_totals is None:
+            totals = (
+                self.frame.groupby(["expiration", "optionType"], observed=False)[["volume", "openInterest"]]
+                .sum()
+                .unstack("optionType")
+                .fillna(0)
+            )
+            totals.columns = [f"{metric}_{option_type}" for metric, option_type in totals.columns]
+            totals.index = totals.index.astype(str)
+            self._expiration_totals = totals
+        return self._expiration_totals
+
+    def ladder(self) -> StrikeLadder:
+        """Strike ladder of this expiration set, built on first use."""
+        if self._ladder is None:
+            self._ladder = StrikeLadder(self.frame)
+        return self._ladder
+
+    def window(self, min_strike: float, max_strike: float) -> "ChainFrame":
+        frame = self.strike_window(min_strike, max_strike).reset_index(drop=True)
+        frame["expiration"] = frame["expiration"].cat.remove_unused_categories()
+        return ChainFrame(frame)
+
+
+def as_chain_frame(chain: Union[pd.DataFrame, ChainFrame]) -> ChainFrame:
+    return chain if isinstance(chain, ChainFrame) else ChainFrame.from_frame(chain)
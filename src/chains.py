@@ -1,9 +1,13 @@
 import pandas as pd
 import logging
+import os
+import threading
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from storage import upload_to_storage
 from pathlib import Path
+from typing import Optional
+from snapshot_cache import SnapshotCache
 
 
 sorted_chain_columns = [
@@ -20,36 +24,53 @@ sorted_chain_columns = [
 ]
 
 
-def get_full_option_chain(symbol: str, quiet: bool = False) -> pd.DataFrame:
+CHAIN_FETCH_WORKERS = 8
+# Yahoo requests in flight at once in this process, however many symbols are fetched concurrently; more get throttled
+YAHOO_MAX_REQUESTS = int(os.environ.get("YAHOO_MAX_REQUESTS", 8))
+_yahoo_requests = threading.BoundedSemaphore(YAHOO_MAX_REQUESTS)
+
+
+def get_expiration_chain(ticker: yf.Ticker, expiration: str) -> pd.DataFrame:
+    with _yahoo_requests:
+        chain = ticker.option_chain(expiration)
+    calls = chain.calls.assign(optionType="call", expiration=expiration)
+    puts = chain.puts.assign(optionType="put", expiration=expiration)
+    return pd.concat([calls[sorted_chain_columns], puts[sorted_chain_columns]])
+
+
+def get_full_option_chain(
+    symbol: str, quiet: bool = False, max_workers: int = CHAIN_FETCH_WORKERS
+) -> pd.DataFrame:
+    """Fetch every expiration once, concurrently, and concat the result in one pass."""
     ticker = yf.Ticker(symbol)
-    dates = ticker.options
-
-    options = pd.DataFrame()
-
-    for _date in dates:
-        calls = ticker.option_chain(_date).calls
-        calls["optionType"] = "call"
-        calls["expiration"] = _date
-        calls = calls[sorted_chain_columns]
-        puts = ticker.option_chain(_date).puts
-        puts["optionType"] = "put"
-        puts["expiration"] = _date
-        puts = puts[sorted_chain_columns]
-
-        temp = pd.merge(calls, puts, how="outer", on="strike")
-        temp["expiration"] = _date
-        options = (
-            pd.concat([options, pd.concat([calls, puts])], axis=0)
-            .fillna(0)
-            .reset_index(drop=True)
-        )
-    return options
+    with _yahoo_requests:
+        dates = ticker.options
+    if not dates:
+        return pd.DataFrame(columns=sorted_chain_columns)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(dates))) as executor:
+        chains = list(executor.map(lambda _date: get_expiration_chain(ticker, _date), dates))
+
+    if not quiet:
+        logging.info(f"fetched {len(dates)} expirations for {symbol}")
+    return pd.concat(chains, axis=0, ignore_index=True).fillna(0)
+
+
+def get_cached_full_option_chain(symbol: str, cache: SnapshotCache = None, now: Optional[float] = None) -> pd.DataFrame:
+    cache = cache or SnapshotCache()
+    return cache.get_or_fetch(symbol, "chain", lambda: get_full_option_chain(symbol), now=now)
 
 
 def pull_and_push_to_bucket(symbol: str):
+    # google.cloud is only needed here, not by the reports importing this module
+    from storage import upload_to_storage
+
     report_date: str = datetime.now().strftime("%Y-%m-%d")
     report_time: str = datetime.now().strftime("%H:%M")
+    # stored under the current time, not the cache's snapshot that may be up to its TTL older; cached for the reports
+    # run in the same window
     chain = get_full_option_chain(symbol)
+    SnapshotCache().put(chain, symbol, "chain")
 
     path = Path(f"chains/{symbol}/{report_date}/{report_time}/")
     path.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,62 @@
+import json
+import logging
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from snapshot_cache import CACHE_DIR
+
+# one line per section that ran out of time, to see which data sources are slow
+TIMEOUTS_PATH = os.path.join(CACHE_DIR, "timeouts.jsonl")
+
+
+@dataclass
+class Deadline:
+    """Time budget of one run: seconds for the whole run and for each ticker, None waits forever."""
+
+    seconds: Optional[float] = None
+    ticker_seconds: Optional[float] = None
+    started_at: float = field(default_factory=time.monotonic)
+    ticker_started_at: Dict[str, float] = field(default_factory=dict, init=False)
+    timed_out: List[Tuple[str, str, float]] = field(default_factory=list, init=False)
+
+    def start_ticker(self, symbol: str) -> None:
+        self.ticker_started_at.setdefault(symbol, time.monotonic())
+
+    def expires_at(self, symbol: Optional[str] = None) -> float:
+        expires_at = math.inf if self.seconds is None else self.started_at + self.seconds
+        if symbol in self.ticker_started_at and self.ticker_seconds is not None:
+            expires_at = min(expires_at, self.ticker_started_at[symbol] + self.ticker_seconds)
+        return expires_at
+
+    def remaining(self, symbols: Iterable[str] = ()) -> Optional[float]:
+        """Seconds until the run or the first of the tickers runs out of time, None without a limit."""
+        expires_at = min([self.expires_at(), *(self.expires_at(symbol) for symbol in symbols)])
+        return None if expires_at == math.inf else max(expires_at - time.monotonic(), 0.0)
+
+    def expired(self, symbol: Optional[str] = None) -> bool:
+        return time.monotonic() >= self.expires_at(symbol)
+
+    def record(self, symbol: str, section: str) -> float:
+        """Note a section skipped for lack of time, returns the seconds its ticker had been running."""
+        now = time.monotonic()
+        seconds = now - self.ticker_started_at.get(symbol, now)
+        self.timed_out.append((symbol, section, seconds))
+        logging.warning(f"{symbol} {section} timed out after {seconds:.1f}s")
+        return seconds
+
+    def save(self, report: str, path: str = TIMEOUTS_PATH) -> None:
+        if not self.timed_out:
+            return
+        logging.warning(f"{len(self.timed_out)} sections timed out, listed in {path}")
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as fh:
+                for symbol, section, seconds in self.timed_out:
+                    line = {"report": report, "symbol": symbol, "section": section, "seconds": round(seconds, 1)}
+                    fh.write(json.dumps(line) + "\n")
+        except OSError as error:
+            logging.warning(f"Failed to store timeouts: {error}")
+        self.timed_out = []
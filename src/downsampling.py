@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from plotly.graph_objects import Figure
+
+# per-point trace attributes kept aligned with the surviving points
+POINT_ATTRIBUTES = ["text", "hovertext", "customdata"]
+
+
+def numeric_axis(values) -> np.ndarray:
+    """x values as floats: numbers as they are, dates as nanoseconds, anything else as positions."""
+    values = np.asarray(values)
+    if values.dtype.kind in "iuf":
+        return values.astype(float)
+    try:
+        return pd.DatetimeIndex(pd.to_datetime(values)).asi8.astype(float)
+    except (TypeError, ValueError):
+        return np.arange(len(values), dtype=float)
+
+
+def bucket_means(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    """NaN-ignoring mean of values[edges[i]:edges[i + 1]] for every bucket, from cumulative sums."""
+    finite = np.isfinite(values)
+    sums = np.concatenate([[0.0], np.cumsum(np.where(finite, values, 0.0))])
+    counts = np.concatenate([[0], np.cumsum(finite)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (sums[edges[1:]] - sums[edges[:-1]]) / (counts[edges[1:]] - counts[edges[:-1]])
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Positions of the n_out points Largest-Triangle-Three-Buckets keeps, the first and last always among them.
+
+    Each bucket keeps the point spanning the largest triangle with the previously kept point and the next
+    bucket's mean, so peaks and troughs survive. Bucket means come from one cumulative sum and each bucket's
+    areas from one array expression; only the chain of kept points is walked bucket by bucket.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # n_out - 2 buckets over the inner points 1 .. n - 2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    next_x = np.append(bucket_means(x, edges)[1:], x[-1])
+    next_y = np.append(bucket_means(y, edges)[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    kept = 0
+    for bucket in range(n_out - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        anchor_x, anchor_y = x[kept], y[kept]
+        area = np.abs(
+            (anchor_x - next_x[bucket]) * (y[start:stop] - anchor_y)
+            - (anchor_x - x[start:stop]) * (next_y[bucket] - anchor_y)
+        )
+        kept = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        selected[bucket + 1] = kept
+    return selected
+
+
+def downsample_figure(figure: Figure, max_points: int) -> Figure:
+    """Thin every scatter/line trace longer than max_points with LTTB, in place."""
+    for trace in figure.data:
+        if trace.type not in ["scatter", "scattergl"] or trace.y is None or len(trace.y) <= max_points:
+            continue
+        y = np.asarray(trace.y)
+        if y.dtype.kind not in "iuf":
+            continue
+        x = numeric_axis(trace.x) if trace.x is not None else np.arange(len(y), dtype=float)
+        keep = lttb_indices(x, y.astype(float), max_points)
+
+        update = {"y": y[keep]}
+        if trace.x is not None:
+            update["x"] = np.asarray(trace.x)[keep]
+        for attribute in POINT_ATTRIBUTES:
+            values = trace[attribute]
+            if values is not None and not isinstance(values, str) and len(values) == len(y):
+                update[attribute] = np.asarray(values)[keep]
+        trace.update(update)
+    return figure
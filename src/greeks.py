@@ -0,0 +1,208 @@
+import logging
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+GREEK_COLUMNS = ["Delta", "Gamma", "Vega", "Theta", "Vanna"]
+MIN_VOL = 1e-4
+MAX_VOL = 5.0
+
+
+def risk_free_rate() -> float:
+    # a resident process outlives the day, the rate is fetched again on the next one
+    return risk_free_rate_on(date.today())
+
+
+@lru_cache(maxsize=1)
+def risk_free_rate_on(day: date) -> float:
+    """Today's rate, day only keys the cache."""
+    from openbb_terminal.helper_funcs import get_rf
+
+    return get_rf()
+
+
+def days_to_expiration(expirations) -> np.ndarray:
+    """Days left until 16:00 on the expiration date, the same convention as op_helpers.get_greeks."""
+    expirations = pd.Series(expirations)
+    if isinstance(expirations.dtype, pd.CategoricalDtype):
+        # parse every distinct date once
+        days = days_to_expiration(expirations.cat.categories)
+        return days[expirations.cat.codes.to_numpy()]
+    expire = pd.to_datetime(expirations.astype(str), format="%Y-%m-%d").to_numpy()
+    now = np.datetime64(datetime.now())
+    return (expire - now + np.timedelta64(16, "h")) / np.timedelta64(1, "D")
+
+
+def black_scholes_greeks(
+    spot,
+    strike,
+    days,
+    vol,
+    is_call,
+    rf: float,
+    div_cont: float = 0,
+) -> Dict[str, np.ndarray]:
+    """Greeks for any broadcastable arrays of contracts, scaled like op_helpers.Option.
+
+    Contracts with non-positive expiry, volatility, spot or strike get NaN greeks.
+    """
+    spot, strike, days, vol, is_call = np.broadcast_arrays(
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(days, dtype=float),
+        np.asarray(vol, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    valid = (days > 0) & (vol > 0) & (spot > 0) & (strike > 0)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exp_time = days / 365.0
+        sqrt_time = np.sqrt(exp_time)
+        sigma_t = vol * sqrt_time
+        d1 = (np.log(spot / strike) + (rf - div_cont + 0.5 * vol**2) * exp_time) / sigma_t
+        d2 = d1 - sigma_t
+        pdf_d1 = np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi)
+        dfq = np.exp(-div_cont * exp_time)
+        df = np.exp(-rf * exp_time)
+
+        greeks = {
+            "Delta": dfq * (ndtr(d1) - np.where(is_call, 0.0, 1.0)),
+            "Gamma": dfq * pdf_d1 / (spot * sigma_t),
+            "Vega": 0.01 * spot * dfq * pdf_d1 * sqrt_time,
+            "Theta": (
+                -0.5 * spot * dfq * pdf_d1 * vol / sqrt_time
+                + sign * (div_cont * spot * dfq * ndtr(sign * d1) - rf * strike * df * ndtr(sign * d2))
+            )
+            / 365.0,
+            "Vanna": 0.01 * -dfq * d2 / vol * pdf_d1,
+        }
+
+    return {name: np.where(valid, values, np.nan) for name, values in greeks.items()}
+
+
+def black_scholes_gamma(spot, strike, days, vol, rf: float, div_cont: float = 0) -> np.ndarray:
+    """Gamma alone, for large broadcast grids where the other greeks would be wasted work."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exp_time = days / 365.0
+        sigma_t = vol * np.sqrt(exp_time)
+        d1 = (np.log(spot / strike) + (rf - div_cont + 0.5 * vol**2) * exp_time) / sigma_t
+        gamma = np.exp(-div_cont * exp_time - 0.5 * d1**2) / (np.sqrt(2 * np.pi) * spot * sigma_t)
+    return np.where((days > 0) & (vol > 0) & (spot > 0) & (strike > 0), gamma, np.nan)
+
+
+def chain_greeks(
+    chain: pd.DataFrame, current_price: float, rf: Optional[float] = None, div_cont: float = 0
+) -> pd.DataFrame:
+    """Delta, gamma, vega, theta and vanna for every contract of the chain in one pass."""
+    greeks = black_scholes_greeks(
+        current_price,
+        chain["strike"].to_numpy(),
+        days_to_expiration(chain["expiration"]),
+        chain["impliedVolatility"].to_numpy(),
+        (chain["optionType"] == "call").to_numpy(),
+        risk_free_rate() if rf is None else rf,
+        div_cont,
+    )
+    return pd.DataFrame(greeks, index=chain.index, columns=GREEK_COLUMNS)
+
+
+def black_scholes_price_and_vega(
+    spot, strike, days, vol, is_call, rf: float, div_cont: float = 0
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Premium and vega (per 1.0 of volatility) for broadcastable arrays of contracts."""
+    sign = np.where(is_call, 1.0, -1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exp_time = days / 365.0
+        sqrt_time = np.sqrt(exp_time)
+        sigma_t = vol * sqrt_time
+        d1 = (np.log(spot / strike) + (rf - div_cont + 0.5 * vol**2) * exp_time) / sigma_t
+        d2 = d1 - sigma_t
+        dfq = np.exp(-div_cont * exp_time)
+        price = sign * (spot * dfq * ndtr(sign * d1) - strike * np.exp(-rf * exp_time) * ndtr(sign * d2))
+        vega = spot * dfq * np.exp(-0.5 * d1**2) / np.sqrt(2 * np.pi) * sqrt_time
+    return price, vega
+
+
+def implied_volatility(
+    price,
+    spot,
+    strike,
+    days,
+    is_call,
+    rf: float,
+    div_cont: float = 0,
+    tol: float = 1e-6,
+    max_iter: int = 100,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve all contracts at once with Newton steps, falling back to bisection whenever a step leaves the bracket.
+
+    Returns the volatilities and a mask of contracts that converged; the rest are NaN.
+    """
+    price, spot, strike, days, is_call = np.broadcast_arrays(
+        np.asarray(price, dtype=float),
+        np.asarray(spot, dtype=float),
+        np.asarray(strike, dtype=float),
+        np.asarray(days, dtype=float),
+        np.asarray(is_call, dtype=bool),
+    )
+    exp_time = days / 365.0
+    forward_spot = spot * np.exp(-div_cont * exp_time)
+    discounted_strike = strike * np.exp(-rf * exp_time)
+    lower_bound = np.maximum(np.where(is_call, forward_spot - discounted_strike, discounted_strike - forward_spot), 0)
+    upper_bound = np.where(is_call, forward_spot, discounted_strike)
+    solvable = (days > 0) & (spot > 0) & (strike > 0) & (price > lower_bound) & (price < upper_bound)
+
+    low = np.full(price.shape, MIN_VOL)
+    high = np.full(price.shape, MAX_VOL)
+    vol = np.full(price.shape, 0.3)
+    converged = ~solvable
+
+    for _ in range(max_iter):
+        model_price, vega = black_scholes_price_and_vega(spot, strike, days, vol, is_call, rf, div_cont)
+        diff = model_price - price
+        converged |= np.abs(diff) < tol * np.maximum(price, 1)
+        if converged.all():
+            break
+
+        high = np.where(diff > 0, vol, high)
+        low = np.where(diff < 0, vol, low)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = vol - diff / vega
+        bisect = (low + high) / 2
+        step = np.where(np.isfinite(newton) & (newton > low) & (newton < high), newton, bisect)
+        vol = np.where(converged, vol, step)
+
+    converged &= solvable
+    return np.where(converged, vol, np.nan), converged
+
+
+def chain_implied_volatility(chain: pd.DataFrame, current_price: float, rf: Optional[float] = None) -> pd.DataFrame:
+    """Implied volatility recomputed from bid/ask mids (last price when there is no quote)."""
+    quoted = (chain["bid"] > 0) & (chain["ask"] > 0)
+    mid = np.where(quoted, (chain["bid"] + chain["ask"]) / 2, chain["lastPrice"])
+    vol, converged = implied_volatility(
+        mid,
+        current_price,
+        chain["strike"].to_numpy(),
+        days_to_expiration(chain["expiration"]),
+        (chain["optionType"] == "call").to_numpy(),
+        risk_free_rate() if rf is None else rf,
+    )
+    return pd.DataFrame({"impliedVolatility": vol, "ivConverged": converged}, index=chain.index)
+
+
+def with_solved_implied_volatility(chain: pd.DataFrame, current_price: float) -> pd.DataFrame:
+    """Chain whose impliedVolatility is the solver's where it converged and Yahoo's elsewhere."""
+    solved = chain_implied_volatility(chain, current_price)
+    failed = len(chain) - int(solved["ivConverged"].sum())
+    if failed:
+        logging.info(f"Implied volatility did not converge for {failed} of {len(chain)} contracts")
+    return chain.assign(
+        impliedVolatility=solved["impliedVolatility"].where(solved["ivConverged"], chain["impliedVolatility"]),
+        ivConverged=solved["ivConverged"],
+    )
@@ -1,12 +1,12 @@
+import importlib
 import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 
 import click
-import pandas as pd
-from emails import send_email
-from reports.options import OptionReport, OptionReportV2
-from reports.gex import GEXFullReport
-from storage import upload_to_storage
 
 logging.basicConfig(
     format="%(asctime)s %(levelname)s %(filename)s %(funcName)s %(message)s",
@@ -14,33 +14,137 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
-@click.command()
-@click.option("--send", default=False, help="Send in to the bucket and send email")
-@click.option("--report_type", default="Normal", help="Type of the report")
-def process(send, report_type):
+DEFAULT_TICKERS = ["^SPX", "^VIX", "SPY", "SPXL", "QQQ", "IWM", "DIA", "GLD", "TLT", "SMH", "SOXL", "USO"]
+# report class per --report_type, imported only when that type is run
+REPORT_TYPES = {
+    "GEX": ("reports.gex", "GEXFullReport"),
+    "US30": ("reports.options", "OptionReportV2"),
+    "Normal": ("reports.options", "OptionReportV2"),
+}
+PREFETCH_WORKERS = 4
+START = time.perf_counter()
+
+import_seconds: Dict[str, float] = {}
+
+
+def import_timed(name: str):
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    import_seconds.setdefault(name, time.perf_counter() - start)
+    return module
 
+
+def report_tickers(report_type: str) -> List[str]:
     if report_type == "GEX":
-        report = GEXFullReport(
-            author="Dawid S.", report_title="Options Report", tickers=["SPY"], multiprocessing=False
-        )
-    elif report_type == "US30":
+        return ["SPY"]
+    if report_type == "US30":
+        pd = import_timed("pandas")
         tickers = pd.read_csv("us30.csv", header=None)[0].tolist()
-        tickers = tickers[1:-1]
-        report = OptionReportV2(
-            author="Dawid S.", report_title="Options Report", tickers=tickers, multiprocessing=True
-        )
-    else:
-        tickers = ["^SPX", "^VIX", "SPY", "SPXL", "QQQ", "IWM", "DIA", "GLD", "TLT", "SMH", "SOXL", "USO"]
+        return tickers[1:-1]
+    return DEFAULT_TICKERS
+
+
+def prefetch_chains(tickers: List[str]) -> threading.Thread:
+    """Download option chains into the snapshot cache while the report modules are still being imported."""
+    chains = import_timed("chains")
+    logging.info(f"Prefetching {len(tickers)} chains, {time.perf_counter() - START:.2f}s after start")
+
+    def fetch(symbol: str) -> None:
+        try:
+            chains.get_cached_full_option_chain(symbol)
+        except Exception as error:
+            logging.warning(f"Failed to prefetch {symbol} chain: {error}")
+
+    def fetch_all() -> None:
+        with ThreadPoolExecutor(max_workers=PREFETCH_WORKERS) as executor:
+            list(executor.map(fetch, tickers))
+
+    thread = threading.Thread(target=fetch_all, daemon=True)
+    thread.start()
+    return thread
 
-        report = OptionReportV2(
-            author="Dawid S.", report_title="Options Report", tickers=tickers, multiprocessing=True
-        )
+
+def build_report(report_type: str, tickers: List[str], multiprocessing: bool, **options):
+    module_name, class_name = REPORT_TYPES.get(report_type, REPORT_TYPES["Normal"])
+    report_class = getattr(import_timed(module_name), class_name)
+    return report_class(
+        author="Dawid S.",
+        report_title="Options Report",
+        tickers=tickers,
+        multiprocessing=multiprocessing,
+        **options,
+    )
+
+
+def send_report(full_file_name: str, layout: str) -> None:
+    upload_to_storage = import_timed("storage").upload_to_storage
+    send_email = import_timed("emails").send_email
+    upload_path = os.path.dirname(full_file_name) if layout == "fragments" else full_file_name
+    signed_url = upload_to_storage(upload_path)
+    send_email(full_file_name, signed_url)
+
+
+@click.command()
+@click.option("--send", default=False, help="Send in to the bucket and send email")
+@click.option("--report_type", default="Normal", help="Type of the report")
+@click.option(
+    "--output",
+    default="image",
+    type=click.Choice(["image", "interactive"]),
+    help="Embed charts as rendered images or as interactive plotly charts",
+)
+@click.option(
+    "--layout",
+    default="single",
+    type=click.Choice(["single", "fragments"]),
+    help="One HTML file, or an index with a lazily loaded file per tab",
+)
+@click.option("--deadline", type=float, default=None, help="Seconds the run may take, late sections are skipped")
+@click.option("--ticker-deadline", type=float, default=None, help="Seconds each ticker may take")
+@click.option("--shard", default=None, help="Run only shard i/N of the tickers (i from 0), merged later by merge.py")
+@click.option("--run-id", default=None, help="Id shared by all shards of one run, required with --shard")
+@click.option("--shard-dir", default=None, help="Directory shared by the shards, defaults to reports/shards/<run id>")
+@click.option("--timing-imports", is_flag=True, default=False, help="Log how long each lazy import took")
+def process(send, report_type, output, layout, deadline, ticker_deadline, shard, run_id, shard_dir, timing_imports):
+    tickers = report_tickers(report_type)
+    if shard is not None:
+        if not run_id:
+            # the merge tells this run's shards from those another run left in the directory by it
+            raise click.BadParameter("a sharded run needs an id given to all its shards", param_hint="--run-id")
+        shards = import_timed("reports.shards")
+        shard_dir = shard_dir or os.path.join("reports", "shards", run_id)
+        try:
+            shard = shards.Shard.parse(shard, tickers, shard_dir, run_id)
+        except ValueError as error:
+            raise click.BadParameter(str(error), param_hint="--shard")
+        tickers = shard.own_tickers()
+    prefetch = prefetch_chains(tickers)
+
+    report = build_report(
+        report_type,
+        tickers,
+        # GEX is a single ticker, only the sections run in the pool can be cut off at a deadline
+        multiprocessing=report_type != "GEX" or deadline is not None or ticker_deadline is not None,
+        output=output,
+        layout=layout,
+        # counted from the start of the process, imports included
+        deadline=None if deadline is None else deadline - (time.perf_counter() - START),
+        ticker_deadline=ticker_deadline,
+        shard=shard,
+    )
+    # workers are forked from this process, no download threads may be running by then
+    prefetch.join()
 
     report.process()
     full_file_name = report.save_to_html()
-    if send:
-        signed_url = upload_to_storage(full_file_name)
-        send_email(full_file_name, signed_url)
+    if send and shard is not None:
+        logging.info(f"Shard {shard.index}/{shard.count} done, the merge sends the report")
+    elif send:
+        send_report(full_file_name, layout)
+
+    if timing_imports:
+        for name, seconds in import_seconds.items():
+            logging.info(f"import {name}: {seconds:.2f}s")
 
 
 if __name__ == "__main__":
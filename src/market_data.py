@@ -0,0 +1,124 @@
+import logging
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+import chains
+import greeks
+from bar_store import BarStore
+from chain_frame import ChainFrame
+from retry import with_retry
+from snapshot_cache import SnapshotCache
+
+HISTORY_BATCH_SIZE = 50
+HISTORY_COLUMNS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+def load_histories(
+    symbols: List[str], start_date: str, batch_size: int = HISTORY_BATCH_SIZE
+) -> Dict[str, pd.DataFrame]:
+    """Daily bars for many tickers, fetched in grouped multi-ticker requests."""
+    histories = {}
+    for offset in range(0, len(symbols), batch_size):
+        group = symbols[offset : offset + batch_size]
+        logging.info(f"Downloading {len(group)} histories from {start_date}...")
+        data = yf.download(group, start=start_date, group_by="ticker", progress=False, threads=True)
+        for symbol in group:
+            if not isinstance(data.columns, pd.MultiIndex):
+                frame = data
+            elif symbol in data.columns.get_level_values(0):
+                frame = data[symbol]
+            else:
+                frame = pd.DataFrame(columns=HISTORY_COLUMNS)
+            histories[symbol] = frame.dropna(how="all")
+    return histories
+
+
+def fetch_price(symbol: str) -> float:
+    from openbb_terminal.stocks.options import yfinance_model
+
+    return yfinance_model.get_price(symbol)
+
+
+@dataclass
+class MarketData:
+    """Per-symbol market data memoized for the duration of a report run.
+
+    as_of pins the snapshots read to the cache buckets of that time, so every section of a symbol sees the data its
+    plan loaded; None reads the current ones.
+    """
+
+    symbol: str
+    as_of: Optional[float] = None
+    cache: SnapshotCache = field(default_factory=SnapshotCache, repr=False)
+    bars: BarStore = field(default_factory=BarStore, repr=False)
+    _histories: Dict[Tuple[int, str], pd.DataFrame] = field(default_factory=dict, init=False, repr=False)
+    _contract_histories: Dict[str, pd.DataFrame] = field(default_factory=dict, init=False, repr=False)
+
+    # each stage is memoized once it succeeds and retried on its own, so a failure never repeats earlier stages
+
+    @cached_property
+    def raw_chain(self) -> pd.DataFrame:
+        logging.info(f"Fetching option chain for {self.symbol}...")
+        return with_retry(
+            f"{self.symbol} fetch chain",
+            lambda: chains.get_cached_full_option_chain(self.symbol, self.cache, self.as_of),
+        )
+
+    @cached_property
+    def chain(self) -> ChainFrame:
+        def solve() -> pd.DataFrame:
+            full_chain = self.raw_chain.assign(strike=self.raw_chain["strike"].astype(float))
+            return greeks.with_solved_implied_volatility(full_chain, self.price)
+
+        # the sections of a symbol run in other workers, the solved chain is shared through the cache
+        solved_chain = with_retry(
+            f"{self.symbol} compute chain",
+            lambda: self.cache.get_or_fetch(self.symbol, "solved_chain", solve, now=self.as_of),
+        )
+        return ChainFrame.from_frame(solved_chain)
+
+    @cached_property
+    def price(self) -> float:
+        price = with_retry(
+            f"{self.symbol} fetch price",
+            lambda: self.cache.get_or_fetch(
+                self.symbol, "price", lambda: pd.DataFrame({"price": [fetch_price(self.symbol)]}), now=self.as_of
+            ),
+        )
+        return float(price["price"].iloc[0])
+
+    def expiration_chain(self, expiration: str) -> ChainFrame:
+        return self.chain.for_expiration(expiration)
+
+    def history(self, interval: int, start_date: str) -> pd.DataFrame:
+        key = (interval, start_date)
+        if key not in self._histories:
+            self._histories[key] = with_retry(
+                f"{self.symbol} fetch {interval} history", lambda: self.bars.load(self.symbol, interval, start_date)
+            )
+        return self._histories[key]
+
+    def contract_histories(self, contract_symbols: List[str], start_date: str) -> Dict[str, pd.DataFrame]:
+        missing = []
+        for contract in dict.fromkeys(contract_symbols):
+            if contract in self._contract_histories:
+                continue
+            cached = self.cache.get(contract, "history", start_date, self.as_of)
+            if cached is None:
+                missing.append(contract)
+            else:
+                self._contract_histories[contract] = cached
+
+        # kept batch by batch, a retry only downloads the batches still missing
+        for offset in range(0, len(missing), HISTORY_BATCH_SIZE):
+            group = missing[offset : offset + HISTORY_BATCH_SIZE]
+            histories = with_retry(f"{self.symbol} fetch histories", lambda: load_histories(group, start_date))
+            for contract, frame in histories.items():
+                self._contract_histories[contract] = frame
+                self.cache.put(frame, contract, "history", start_date, self.as_of)
+
+        return {contract: self._contract_histories[contract] for contract in contract_symbols}
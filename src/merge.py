@@ -0,0 +1,67 @@
+import logging
+from pathlib import Path
+
+import click
+from openbb_terminal.reports import widget_helpers as widgets
+
+from main import send_report
+from reports.base import Report
+from reports.shards import load_manifests
+
+
+def merge_shards(shard_dir: Path, layout: str = "single", raports_dir: str = "reports") -> str:
+    """Assemble the report from the tabs the shards wrote, in ticker order; tabs of missing shards are noted."""
+    manifests = load_manifests(shard_dir)
+    if not manifests:
+        raise click.ClickException(f"No shard manifests in {shard_dir}")
+    run_ids = {str(manifest.get("run_id")) for manifest in manifests}
+    if len(run_ids) > 1:
+        raise click.ClickException(f"Manifests of runs {sorted(run_ids)} in {shard_dir}, use one directory per run")
+    counts = {manifest["count"] for manifest in manifests}
+    if len(counts) > 1:
+        raise click.ClickException(f"Manifests of runs split {sorted(counts)} ways in {shard_dir}, use one per run")
+
+    first = min(manifests, key=lambda manifest: manifest["index"])
+    done = {manifest["index"] for manifest in manifests if manifest["complete"]}
+    unfinished = sorted(set(range(first["count"])) - done)
+    if unfinished:
+        logging.warning(f"Shards {unfinished} of {first['count']} did not finish, their missing tabs are noted")
+
+    tab_files = {}
+    for manifest in manifests:
+        tab_files.update({symbol: Path(shard_dir, name) for symbol, name in manifest["fragments"].items()})
+    report = Report(
+        tickers=first["tickers"],
+        author=first["author"],
+        report_title=first["report_title"],
+        report_date=first["report_date"],
+        report_time=first["report_time"],
+        output=first["output"],
+        layout=layout,
+        raports_dir=raports_dir,
+    )
+    for symbol in report.tickers:
+        if symbol in tab_files:
+            report.add_tab(symbol, tab_files[symbol].read_text(encoding="utf-8"))
+        else:
+            report.add_tab(symbol, widgets.h(1, f"{symbol} is missing, its shard did not finish"))
+    return report.save_to_html()
+
+
+@click.command()
+@click.argument("shard_dir", type=click.Path(exists=True, file_okay=False))
+@click.option("--send", default=False, help="Send in to the bucket and send email")
+@click.option(
+    "--layout",
+    default="single",
+    type=click.Choice(["single", "fragments"]),
+    help="One HTML file, or an index with a lazily loaded file per tab",
+)
+def merge(shard_dir, send, layout):
+    full_file_name = merge_shards(Path(shard_dir), layout)
+    if send:
+        send_report(full_file_name, layout)
+
+
+if __name__ == "__main__":
+    merge()
@@ -1,50 +1,47 @@
 import logging
 from datetime import datetime
-from typing import Optional, List
+from typing import List, Optional, Union
 
+import numpy as np
 import pandas as pd
-from openbb_terminal.stocks.options import op_helpers
+from scipy.optimize import brentq
 
+import greeks
+from chain_frame import ChainFrame, as_chain_frame
 
-def filter_active_open_interest_expirations_in_chain(chain: pd.DataFrame, option_type: str = "put") -> List[str]:
-    expiration_concentraion = {"expiry": [], "total": []}
 
-    for index, (expiry, local_chain) in enumerate(chain.groupby(["expiration"])):
-        expiration_concentraion["expiry"].append(expiry)
-        total = local_chain[local_chain["optionType"] == option_type]["openInterest"].sum()
-        expiration_concentraion["total"].append(total)
-    expiration_concentraion = pd.DataFrame.from_dict(expiration_concentraion)
-    expirations = list(expiration_concentraion.sort_values(by=["total"], ascending=False)['expiry'][:3])
+def filter_active_open_interest_expirations_in_chain(
+    chain: Union[pd.DataFrame, ChainFrame], option_type: str = "put"
+) -> List[str]:
+    totals = as_chain_frame(chain).expiration_totals()[f"openInterest_{option_type}"]
+    expirations = list(totals.sort_values(ascending=False, kind="stable").index[:3])
     return sorted(expirations, key=lambda x: datetime.strptime(x, '%Y-%m-%d'))
 
-def filter_active_volume_expirations(chain: pd.DataFrame, filter_less_then: int = 0, concentration_type: str = "volume") -> List[str]:
+def filter_active_volume_expirations(chain: Union[pd.DataFrame, ChainFrame], filter_less_then: int = 0, concentration_type: str = "volume") -> List[str]:
     """Filter expirations with less then."""
     logging.info("volatile concentration...")
-    expiration_concentraion = {}
+    totals = as_chain_frame(chain).expiration_totals()
+    expiration_concentraion = totals[f"{concentration_type}_call"] + totals[f"{concentration_type}_put"]
 
-    for expiry, local_chain in chain.groupby(["expiration"]):
-        call = local_chain[local_chain["optionType"] == "call"][concentration_type].sum()
-        puts = local_chain[local_chain["optionType"] == "put"][concentration_type].sum()
-        expiration_concentraion[expiry] = call + puts
-
-    return_expiration_concentraion = {}
+    # lower the threshold in 1k steps until some expiration passes it
+    passing = expiration_concentraion > filter_less_then
+    if filter_less_then and len(expiration_concentraion) and not passing.any():
+        steps = int((filter_less_then - expiration_concentraion.max()) // 1000) + 1
+        filter_less_then -= 1000 * steps
 
     # Filter less then 1k Volume:
-    for key in expiration_concentraion:
-        if expiration_concentraion[key] > filter_less_then:
-            return_expiration_concentraion[key] = expiration_concentraion[key]
-
-    if not len(return_expiration_concentraion) and filter_less_then:
-        return filter_active_volume_expirations(chain, filter_less_then - 1000)
+    return_expiration_concentraion = expiration_concentraion[expiration_concentraion > filter_less_then]
 
     expirations = []
     dte = {
         (datetime.strptime(exp, "%Y-%m-%d") - datetime.now()).days: exp
-        for exp in return_expiration_concentraion
+        for exp in return_expiration_concentraion.index
     }
 
     # get expirations for options 50, 100 and 150 dte
     for close_to_in_days in [150, 100, 50]:
+        if not dte:
+            break
         dte_close_to = min(dte.keys(), key=lambda x: abs(x - close_to_in_days))
         expirations.append(dte[dte_close_to])
         del dte[dte_close_to]
@@ -52,151 +49,117 @@ def filter_active_volume_expirations(chain: pd.DataFrame, filter_less_then: int
     return expirations
 
 
-def call_put_walls(chain: pd.DataFrame, current_price: float) -> tuple:
+def call_put_walls(chain: Union[pd.DataFrame, ChainFrame], current_price: float) -> tuple:
     logging.info("Call Put walls...")
     min_strike = 0.95 * current_price
     max_strike = 1.05 * current_price
+    return as_chain_frame(chain).ladder().walls(current_price, min_strike, max_strike, "volume")
 
-    chain = chain[chain["strike"] >= min_strike]
-    chain = chain[chain["strike"] <= max_strike]
-
-    calls = chain[chain["optionType"] == "call"]
-    puts = chain[chain["optionType"] == "put"]
-
-    option_chain = pd.merge(
-        calls[["volume", "strike", "openInterest"]],
-        puts[["volume", "strike", "openInterest"]],
-        on="strike",
-    )
-
-    option_chain = option_chain.rename(
-        columns={
-            "volume_x": "volume_call",
-            "volume_y": "volume_put",
-            "openInterest_x": "openInterest_call",
-            "openInterest_y": "openInterest_put",
-        }
-    )
 
-    option_chain[["openInterest_put", "volume_put"]] = (
-        option_chain[["openInterest_put", "volume_put"]] * -1
-    )
-    option_chain[["openInterest_call", "volume_call"]] = option_chain[
-        ["openInterest_call", "volume_call"]
-    ]
-    # calculate put/call wall above/bellow price
-    put_wall_id = option_chain[option_chain["strike"] <= current_price][
-        "volume_put"
-    ].idxmin()
-    call_wall_id = option_chain[option_chain["strike"] >= current_price][
-        "volume_call"
-    ].idxmax()
-    put_wall = option_chain.iloc[put_wall_id]
-    call_wall = option_chain.iloc[call_wall_id]
-
-    return put_wall.strike, call_wall.strike
-
-
-def options_levels(full_chain: pd.DataFrame, current_price: float) -> dict:
+def options_levels(full_chain: Union[pd.DataFrame, ChainFrame], current_price: float) -> dict:
     # calculate largest gamma
     logging.info("Calculating options levels...")
+    full_chain = as_chain_frame(full_chain)
     put_wall, call_wall = call_put_walls(full_chain, current_price)
-    levels = {
-        "Curent price": current_price,
-        "Put wall": put_wall,
-        "Call wall": call_wall,
-    }
-    div_cont: float = 0
-    rf: Optional[float] = None
-    show_all: bool = False
+    levels = {"Curent price": current_price}
+    if put_wall is not None:
+        levels["Put wall"] = put_wall
+    if call_wall is not None:
+        levels["Call wall"] = call_wall
 
     min_strike = 0.95 * current_price
     max_strike = 1.05 * current_price
-    largest_values = []
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        results = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=1,
-            show_extra_greeks=show_all,
-        )
-        values = results.sort_values(by=["Gamma"], ascending=False)
-        if not pd.isna(values["Gamma"].iloc[0]):
-            largest_values.append(
-                {
-                    "Strike": values["Strike"].iloc[0],
-                    "Gamma": float(values["Gamma"].iloc[0]),
-                }
-            )
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        results = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=-1,
-            show_extra_greeks=show_all,
-        )
-        values = results.sort_values(by=["Gamma"], ascending=False)
-        if not pd.isna(values["Gamma"].iloc[0]):
-            largest_values.append(
-                {
-                    "Strike": values["Strike"].iloc[0],
-                    "Gamma": float(values["Gamma"].iloc[0]),
-                }
-            )
-
-    largest_values = sorted(largest_values, key=lambda d: d["Gamma"], reverse=True)[:2]
-    for index, value in enumerate(largest_values):
-        levels[f"Large Gamma {index}"] = value["Strike"]
+    chain = full_chain.strike_window(min_strike, max_strike)
+    chain = chain.assign(Gamma=greeks.chain_greeks(chain, current_price)["Gamma"]).dropna(subset=["Gamma"])
+
+    # the largest gamma of every expiration, for calls and for puts
+    largest_ids = chain.groupby(["expiration", "optionType"], observed=True)["Gamma"].idxmax()
+    largest_values = chain.loc[largest_ids].sort_values(by=["Gamma"], ascending=False, kind="stable")[:2]
+    for index, strike in enumerate(largest_values["strike"]):
+        levels[f"Large Gamma {index}"] = strike
+
+    zero_gamma = zero_gamma_level(full_chain, current_price)
+    if zero_gamma:
+        levels["Zero gamma"] = zero_gamma
 
     return levels
 
 
-def largest_gamma(full_chain: pd.DataFrame, current_price: float) -> str:
+def largest_gamma(full_chain: Union[pd.DataFrame, ChainFrame], current_price: float) -> str:
     # calculate largest gamma
     logging.info("Calculating largest gamma...")
-    div_cont: float = 0
-    rf: Optional[float] = None
-    opt_type: int = 1
-    show_all: bool = False
-
-    greeks = {}
     min_strike = 0.95 * current_price
     max_strike = 1.05 * current_price
 
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        results = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=opt_type,
-            show_extra_greeks=show_all,
-        )
-        greeks[expiry] = results.sort_values(by=["Gamma"], ascending=False)
-
-    largest_gamma_dict = {"expiry": 0, "strike": 0, "gamma": 0}
-
-    for expiry, greek in greeks.items():
-        strike = greek["Strike"].iloc[0]
-        gamma = greek["Gamma"].iloc[0]
-        if largest_gamma_dict["gamma"] < gamma:
-            largest_gamma_dict = {"expiry": expiry, "strike": strike, "gamma": gamma}
-    return largest_gamma_dict["strike"]
+    calls = as_chain_frame(full_chain).strike_window(min_strike, max_strike, option_type="call")
+    gamma = greeks.chain_greeks(calls, current_price)["Gamma"]
+
+    if not (gamma > 0).any():
+        return 0
+    return calls.loc[gamma.idxmax(), "strike"]
+
+
+def gex_table(chain: Union[pd.DataFrame, ChainFrame], current_price: float, price_range: float = 0.1) -> pd.DataFrame:
+    """Call, put (negative) and net gamma exposure per strike, summed over the chain's expirations."""
+    min_strike = (1 - price_range) * current_price
+    max_strike = (1 + price_range) * current_price
+    chain = as_chain_frame(chain).strike_window(min_strike, max_strike)
+
+    exposure = chain["openInterest"] * greeks.chain_greeks(chain, current_price)["Gamma"]
+    exposure = (
+        exposure.groupby([chain["strike"], chain["optionType"]], observed=True)
+        .sum()
+        .unstack("optionType")
+        .reindex(columns=["call", "put"])
+        .fillna(0)
+    )
+
+    gex = pd.DataFrame({"CALL": exposure["call"], "PUT": -exposure["put"]})
+    gex["NET"] = gex["CALL"] + gex["PUT"]
+    gex.index.name = "Strike"
+    return gex
+
+
+def gex_profile(
+    chain: Union[pd.DataFrame, ChainFrame], spot_grid: np.ndarray, rf: Optional[float] = None
+) -> np.ndarray:
+    """Net gamma exposure of the whole chain re-evaluated at every spot of the grid."""
+    chain = as_chain_frame(chain).frame
+    chain = chain[chain["openInterest"] > 0]
+    rf = greeks.risk_free_rate() if rf is None else rf
+    sign = np.where(chain["optionType"] == "call", 1.0, -1.0)
+
+    # contracts x spot grid
+    gamma = greeks.black_scholes_gamma(
+        np.atleast_1d(spot_grid)[np.newaxis, :],
+        chain["strike"].to_numpy()[:, np.newaxis],
+        greeks.days_to_expiration(chain["expiration"])[:, np.newaxis],
+        chain["impliedVolatility"].to_numpy()[:, np.newaxis],
+        rf,
+    )
+    exposure = (sign * chain["openInterest"].to_numpy())[:, np.newaxis] * gamma
+    return np.nansum(exposure, axis=0)
+
+
+def zero_gamma_level(
+    chain: Union[pd.DataFrame, ChainFrame], current_price: float, price_range: float = 0.2, grid_points: int = 200
+) -> Optional[float]:
+    """Spot level closest to the current price where net gamma exposure flips sign."""
+    logging.info("Calculating zero gamma level...")
+    chain = as_chain_frame(chain)
+    rf = greeks.risk_free_rate()
+    spot_grid = np.linspace((1 - price_range) * current_price, (1 + price_range) * current_price, grid_points)
+    profile = gex_profile(chain, spot_grid, rf)
+
+    flips = np.nonzero(np.sign(profile[:-1]) * np.sign(profile[1:]) < 0)[0]
+    if not len(flips):
+        return None
+
+    flip = flips[np.argmin(np.abs(spot_grid[flips] - current_price))]
+    zero_gamma = brentq(
+        lambda spot: gex_profile(chain, np.array([spot]), rf)[0],
+        spot_grid[flip],
+        spot_grid[flip + 1],
+        xtol=0.01,
+    )
+    return round(zero_gamma, 2)
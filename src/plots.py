@@ -1,21 +1,21 @@
 import base64
 import logging
 from datetime import datetime, timedelta
-from pathlib import Path
-from typing import List
+from typing import List, Union
 import numpy as np
 import pandas as pd
-import uuid
 import talib
-import yfinance as yf
 from dateutil.relativedelta import relativedelta
 from openbb_terminal import OpenBBFigure
 from openbb_terminal.core.plots.plotly_ta.ta_class import PlotlyTA
 from openbb_terminal.reports import widget_helpers as widgets
-from openbb_terminal.stocks import stocks_helper
-from openbb_terminal.stocks.options import yfinance_model
-from openbb_terminal.stocks.options import op_helpers, yfinance_model
-from collections import defaultdict
+import options
+from bar_store import BarStore
+from chain_frame import ChainFrame, as_chain_frame
+from market_data import MarketData
+import rendering
+from downsampling import downsample_figure
+from retry import with_retry
 
 
 LINE_WIDTH = 0.8
@@ -23,44 +23,39 @@ CHART_WIDTH = 1600
 CHART_HEIGHT = 1024
 
 
-def temporary_image_path(file_name: str):
-    Path("/tmp/images/").mkdir(parents=True, exist_ok=True)
-    return "/tmp/images/" + file_name + ".png"
+def image_to_html(image: bytes) -> str:
+    bytes = base64.b64encode(image).decode("utf-8")
+    htmlcode = f'<img src="data:image/png;base64,{bytes}">'
+    return htmlcode
 
 
 def plot_to_html_image(plot: OpenBBFigure) -> str:
-    full_path = temporary_image_path(str(uuid.uuid4()))
-    plot.write_image(
-        full_path,
-        format=None,
-        scale=None,
-        width=CHART_WIDTH,
-        height=CHART_HEIGHT,
-        validate=True,
-    )
-    bytes = base64.b64encode(open(full_path, "rb").read()).decode("utf-8")
-    htmlcode = f'<img src="data:image/png;base64,{bytes}">'
-    return htmlcode
+    return plots_to_html_images([plot])[0]
+
+
+def plots_to_html_images(plots: List[OpenBBFigure]) -> List[str]:
+    """Charts of a batch rendered in one call, images or interactive divs by the output mode."""
+    # no point drawing more points than the chart has pixels
+    plots = [downsample_figure(plot, CHART_WIDTH) for plot in plots]
+    if rendering.output_mode() == "interactive":
+        return [rendering.figure_to_html_div(plot, CHART_WIDTH, CHART_HEIGHT) for plot in plots]
+    results = with_retry("render", lambda: rendering.get_renderer().render_many(plots, CHART_WIDTH, CHART_HEIGHT))
+    return [image_to_html(result.image) for result in results]
 
 
 # Expiration Concentration
 def expiration_concentration_plot(
-    chain: pd.DataFrame, concentration: str = "volume"
+    chain: Union[pd.DataFrame, ChainFrame], concentration: str = "volume"
 ) -> str:
     logging.info(f"Expiration concentration for {concentration}...")
-    expiration_concentraion = {"expiry": [], "call": [], "put": []}
-    # openInterest
-
-    for index, (expiry, local_chain) in enumerate(chain.groupby(["expiration"])):
-        expiration_concentraion["expiry"].append(f"{expiry}.")
-        expiration_concentraion["call"].append(
-            local_chain[local_chain["optionType"] == "call"][concentration].sum()
-        )
-        expiration_concentraion["put"].append(
-            -local_chain[local_chain["optionType"] == "put"][concentration].sum()
-        )
-
-    expiration_concentraion = pd.DataFrame.from_dict(expiration_concentraion)
+    totals = as_chain_frame(chain).expiration_totals()
+    expiration_concentraion = pd.DataFrame(
+        {
+            "expiry": [f"{expiry}." for expiry in totals.index],
+            "call": totals[f"{concentration}_call"].to_numpy(),
+            "put": -totals[f"{concentration}_put"].to_numpy(),
+        }
+    )
 
     option_absolute_plot = OpenBBFigure()
     option_absolute_plot.add_bar(
@@ -83,7 +78,7 @@ def expiration_concentration_plot(
     return htmlcode
 
 def detailed_option_plot(
-    chain: pd.DataFrame,
+    chain: Union[pd.DataFrame, ChainFrame],
     current_price: float,
     price_range: float = 0.05,
     description: str = "",
@@ -94,47 +89,10 @@ def detailed_option_plot(
     min_strike = (1 - price_range) * current_price
     max_strike = (1 + price_range) * current_price
 
-    chain = chain[chain["strike"] >= min_strike]
-    chain = chain[chain["strike"] <= max_strike]
-
-    calls = chain[chain["optionType"] == "call"]
-    puts = chain[chain["optionType"] == "put"]
-
-    option_chain = pd.merge(
-        calls[["volume", "strike", "openInterest"]],
-        puts[["volume", "strike", "openInterest"]],
-        on="strike",
-    )
-
-    option_chain = option_chain.rename(
-        columns={
-            "volume_x": "volume_call",
-            "volume_y": "volume_put",
-            "openInterest_x": "openInterest_call",
-            "openInterest_y": "openInterest_put",
-        }
-    )
-
-    option_chain[["openInterest_put", "volume_put"]] = (
-        option_chain[["openInterest_put", "volume_put"]] * -1
-    )
-    option_chain[["openInterest_call", "volume_call"]] = option_chain[
-        ["openInterest_call", "volume_call"]
-    ]
-
+    ladder = as_chain_frame(chain).ladder()
+    option_chain = ladder.window(min_strike, max_strike)
     # calculate put/call wall above/bellow price
-    try:
-        put_wall_id = option_chain[option_chain["strike"] <= current_price][
-            put_field_name
-        ].idxmin()
-        call_wall_id = option_chain[option_chain["strike"] >= current_price][
-            call_field_name
-        ].idxmax()
-        put_wall = option_chain.iloc[put_wall_id].strike
-        call_wall = option_chain.iloc[call_wall_id].strike
-    except Exception:
-        put_wall = None
-        call_wall = None
+    put_wall, call_wall = ladder.walls(current_price, min_strike, max_strike, "openInterest")
     option_absolute_plot = OpenBBFigure()
 
     option_absolute_plot.add_bar(
@@ -176,22 +134,23 @@ def detailed_option_plot(
     return htmlcode
 
 def absolute_options_concentration_plot(
-    chain: pd.DataFrame,
+    chain: Union[pd.DataFrame, ChainFrame],
     current_price: float,
     only_current_expiration: bool = False,
     only_next_friday_expiration: bool = False,
     concentration: str = "volume",
     price_range: float = 0.05,
 ) -> str:
-    current_expiration = chain.expiration.iloc[0]
+    chain = as_chain_frame(chain)
+    current_expiration = chain.expirations[0]
     if only_current_expiration:
-        chain = chain[chain["expiration"] == current_expiration]
+        chain = chain.for_expiration(current_expiration)
 
     elif only_next_friday_expiration:
         today = datetime.today()
         friday_expiration = today + timedelta((4 - today.weekday()) % 7)
         current_expiration = friday_expiration.strftime("%Y-%m-%d")
-        chain = chain[chain["expiration"] == current_expiration]
+        chain = chain.for_expiration(current_expiration)
 
     if concentration == "volume":
         call_field_name = "volume_call"
@@ -209,47 +168,10 @@ def absolute_options_concentration_plot(
     min_strike = (1 - price_range) * current_price
     max_strike = (1 + price_range) * current_price
 
-    chain = chain[chain["strike"] >= min_strike]
-    chain = chain[chain["strike"] <= max_strike]
-
-    calls = chain[chain["optionType"] == "call"]
-    puts = chain[chain["optionType"] == "put"]
-
-    option_chain = pd.merge(
-        calls[["volume", "strike", "openInterest"]],
-        puts[["volume", "strike", "openInterest"]],
-        on="strike",
-    )
-
-    option_chain = option_chain.rename(
-        columns={
-            "volume_x": "volume_call",
-            "volume_y": "volume_put",
-            "openInterest_x": "openInterest_call",
-            "openInterest_y": "openInterest_put",
-        }
-    )
-
-    option_chain[["openInterest_put", "volume_put"]] = (
-        option_chain[["openInterest_put", "volume_put"]] * -1
-    )
-    option_chain[["openInterest_call", "volume_call"]] = option_chain[
-        ["openInterest_call", "volume_call"]
-    ]
-
+    ladder = chain.ladder()
+    option_chain = ladder.window(min_strike, max_strike)
     # calculate put/call wall above/bellow price
-    try:
-        put_wall_id = option_chain[option_chain["strike"] <= current_price][
-            put_field_name
-        ].idxmin()
-        call_wall_id = option_chain[option_chain["strike"] >= current_price][
-            call_field_name
-        ].idxmax()
-        put_wall = option_chain.iloc[put_wall_id].strike
-        call_wall = option_chain.iloc[call_wall_id].strike
-    except Exception:
-        put_wall = None
-        call_wall = None
+    put_wall, call_wall = ladder.walls(current_price, min_strike, max_strike, concentration)
     option_absolute_plot = OpenBBFigure()
 
     option_absolute_plot.add_bar(
@@ -302,6 +224,7 @@ def color_per_level(level: str) -> str:
         "Curent price": "yellow",
         "Call wall": "green",
         "Large Gamma 0": "blue",
+        "Zero gamma": "orange",
     }
     color = "white"
     if level in color_per_type:
@@ -325,20 +248,20 @@ def stock_plot_with_extra_data(stock: pd.DataFrame, levels: List[str] = []) -> s
     return htmlcode
 
 
-def long_period_plot_with_extra_data(symbol: str, levels: List[str] = []) -> str:
+def long_period_plot_with_extra_data(market: MarketData, levels: List[str] = []) -> str:
     start_date = datetime.strftime(
         datetime.now() + relativedelta(months=-12), "%Y-%m-%d"
     )
     interval = 1440 # 1 day
-    stock = stocks_helper.load(symbol, interval=interval, start_date=start_date)
+    stock = market.history(interval, start_date)
 
     htmlcode = widgets.h(5, "Longterm chart with extra data:")
     htmlcode += stock_plot_with_extra_data(stock, levels)
     return htmlcode
 
 
-def one_day_plot_with_extra_data(symbol: str, levels: List[str] = []) -> str:
-    logging.info(f"Stock with extra data {symbol}...")
+def one_day_plot_with_extra_data(market: MarketData, levels: List[str] = []) -> str:
+    logging.info(f"Stock with extra data {market.symbol}...")
 
     days_left = 3
     if datetime.now().today().weekday() == 0 or datetime.now().today().weekday() == 1:
@@ -348,19 +271,49 @@ def one_day_plot_with_extra_data(symbol: str, levels: List[str] = []) -> str:
         datetime.now() + relativedelta(days=-days_left), "%Y-%m-%d"
     )
     interval = 15
-    stock = stocks_helper.load(symbol, interval=interval, start_date=start_date)
+    stock = market.history(interval, start_date)
     htmlcode = widgets.h(5, "One day trading chart with extra data:")
     htmlcode += stock_plot_with_extra_data(stock, levels)
     return htmlcode
 
-    
+
+RSI_WINDOW_DAYS = 365
+
+
+def rsi_history_start(timeperiod: int) -> str:
+    # RSI needs `timeperiod` trading days of warm-up before the plotted window
+    warm_up_days = 3 * timeperiod
+    return datetime.strftime(
+        datetime.now() - timedelta(days=RSI_WINDOW_DAYS + warm_up_days), "%Y-%m-%d"
+    )
+
+
+def rsi_option_contracts(market: MarketData, expirations: List[str], show_put=True) -> List[tuple]:
+    """Most traded contract among the 10 strikes closest to the price, for each expiration."""
+    contracts = []
+    for exp in expirations:
+        side = market.chain.slice(exp, "put" if show_put else "call")
+        close_to = side.iloc[(side["strike"] - market.price).abs().argsort()[:10]]
+        close_to = close_to.sort_values(by=["volume"], ascending=False)
+        contracts.append((exp, close_to["contractSymbol"].iloc[0], close_to["strike"].iloc[0]))
+    return contracts
+
+
+def prefetch_rsi_histories(
+    market: MarketData, call_expirations: List[str], put_expirations: List[str], timeperiod: int = 28
+) -> None:
+    contracts = rsi_option_contracts(market, call_expirations, False) + rsi_option_contracts(
+        market, put_expirations, True
+    )
+    market.contract_histories([contract for _, contract, _ in contracts], rsi_history_start(timeperiod))
+
+
 def rsi_options_plot(
-    symbol, expirations: List[str], show_put=True, timeperiod: int = 28
+    market: MarketData, expirations: List[str], show_put=True, timeperiod: int = 28
 ) -> str:
     """Following plot shows RSI momentum for options with different expirations days."""
 
-    tk = yf.Ticker(symbol)
-    current_price = yfinance_model.get_price(symbol)
+    symbol = market.symbol
 
     option_plot = None
     color_per_expiration = {
@@ -369,25 +322,14 @@ def rsi_options_plot(
         2: "blue",
     }
 
-    for index, exp in enumerate(expirations):
-        opt = tk.option_chain(exp)
-        opt.calls["optionType"] = "call"
-        opt.puts["optionType"] = "put"
-
-        if show_put:
-            close_to = opt.puts.iloc[
-                (opt.puts["strike"] - current_price).abs().argsort()[:10]
-            ]
-        else:
-            close_to = opt.calls.iloc[
-                (opt.calls["strike"] - current_price).abs().argsort()[:10]
-            ]
-        close_to = close_to.sort_values(by=["volume"], ascending=False)
-        option_symbol = close_to["contractSymbol"].iloc[0]
-        option_strike = close_to["strike"].iloc[0]
+    contracts = rsi_option_contracts(market, expirations, show_put)
+    histories = market.contract_histories(
+        [contract for _, contract, _ in contracts], rsi_history_start(timeperiod)
+    )
 
+    for index, (exp, option_symbol, option_strike) in enumerate(contracts):
         logging.info(option_symbol)
-        option_data = yf.download(option_symbol)
+        option_data = histories[option_symbol].copy()
 
         option_data["rsi"] = (
             talib.RSI(option_data["Close"], timeperiod=timeperiod)
@@ -442,80 +384,19 @@ def rsi_options_plot(
     return htmlcode
 
 
-def options_gex_plot(
-    full_chain: pd.DataFrame,
-    current_price: float,
-    only_current_expiration: bool = False,
-    only_next_friday_expiration: bool = False,
-    price_range: float = 0.1,
-) -> str:
-    current_expiration = full_chain.expiration.iloc[0]
-    if only_current_expiration:
-        full_chain = full_chain[full_chain["expiration"] == current_expiration]
-
-    elif only_next_friday_expiration:
-        today = datetime.today()
-        friday_expiration = today + timedelta((4 - today.weekday()) % 7)
-        current_expiration = friday_expiration.strftime("%Y-%m-%d")
-        full_chain = full_chain[full_chain["expiration"] == current_expiration]
-
-    min_strike = (1 - price_range) * current_price
-    max_strike = (1 + price_range) * current_price
-    div_cont: float = 0
-    rf = None
-    total_gex = defaultdict(list)
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        calls = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=1,
-            show_extra_greeks=False,
-        )
-
-        chain = chain[chain["optionType"] == "call"]
-        for _, row in calls.iterrows():
-            oi = chain[chain["strike"] == row.Strike]
-            total_gex["Strike"].append(row.Strike)
-            total_gex["CALL"].append(oi["openInterest"].iloc[0] * row.Gamma)
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        calls = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=-1,
-            show_extra_greeks=False,
-        )
-
-        chain = chain[chain["optionType"] == "put"]
-        for _, row in calls.iterrows():
-            oi = chain[chain["strike"] == row.Strike]
-            total_gex["PUT"].append(-(oi["openInterest"].iloc[0] * row.Gamma))
-
+def gex_figure(gex: pd.DataFrame, current_price: float) -> OpenBBFigure:
     option_absolute_plot = OpenBBFigure()
     option_absolute_plot.add_bar(
-        x=total_gex["Strike"],
-        y=total_gex["CALL"],
+        x=gex.index,
+        y=gex["CALL"],
         name="CALL",
         marker_color="green",
         width=0.8,
     )
 
     option_absolute_plot.add_bar(
-        x=total_gex["Strike"],
-        y=total_gex["PUT"],
+        x=gex.index,
+        y=gex["PUT"],
         name="PUT",
         marker_color="red",
         width=0.8,
@@ -526,6 +407,29 @@ def options_gex_plot(
         name=f"Price: {current_price}",
         line=dict(width=LINE_WIDTH, color="white"),
     )
+    return option_absolute_plot
+
+
+def options_gex_plot(
+    full_chain: Union[pd.DataFrame, ChainFrame],
+    current_price: float,
+    only_current_expiration: bool = False,
+    only_next_friday_expiration: bool = False,
+    price_range: float = 0.1,
+) -> str:
+    full_chain = as_chain_frame(full_chain)
+    current_expiration = full_chain.expirations[0]
+    if only_current_expiration:
+        full_chain = full_chain.for_expiration(current_expiration)
+
+    elif only_next_friday_expiration:
+        today = datetime.today()
+        friday_expiration = today + timedelta((4 - today.weekday()) % 7)
+        current_expiration = friday_expiration.strftime("%Y-%m-%d")
+        full_chain = full_chain.for_expiration(current_expiration)
+
+    gex = options.gex_table(full_chain, current_price, price_range)
+    option_absolute_plot = gex_figure(gex, current_price)
 
     htmlcode = widgets.h(
         5,
@@ -537,79 +441,22 @@ def options_gex_plot(
 
 
 def options_gex_plot_v2(
-    full_chain: pd.DataFrame,
+    full_chain: Union[pd.DataFrame, ChainFrame],
     current_price: float,
     price_range: float = 0.1,
     description: str  = "GEX"
 ) -> str:
-    min_strike = (1 - price_range) * current_price
-    max_strike = (1 + price_range) * current_price
-    div_cont: float = 0
-    rf = None
-    total_gex = defaultdict(list)
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        calls = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=1,
-            show_extra_greeks=False,
-        )
+    gex = options.gex_table(full_chain, current_price, price_range)
+    option_absolute_plot = gex_figure(gex, current_price)
 
-        chain = chain[chain["optionType"] == "call"]
-        for _, row in calls.iterrows():
-            oi = chain[chain["strike"] == row.Strike]
-            total_gex["Strike"].append(row.Strike)
-            total_gex["CALL"].append(oi["openInterest"].iloc[0] * row.Gamma)
-
-    for expiry, chain in full_chain.groupby(["expiration"]):
-        chain = chain[chain["strike"] >= min_strike]
-        chain = chain[chain["strike"] <= max_strike]
-        calls = op_helpers.get_greeks(
-            current_price=current_price,
-            expire=expiry,
-            calls=chain[chain["optionType"] == "call"],
-            puts=chain[chain["optionType"] == "put"],
-            div_cont=div_cont,
-            rf=rf,
-            opt_type=-1,
-            show_extra_greeks=False,
+    zero_gamma = options.zero_gamma_level(full_chain, current_price)
+    if zero_gamma:
+        option_absolute_plot.add_vline_legend(
+            x=zero_gamma,
+            name=f"Zero gamma = {zero_gamma}",
+            line=dict(width=LINE_WIDTH, color=color_per_level("Zero gamma")),
         )
 
-        chain = chain[chain["optionType"] == "put"]
-        for _, row in calls.iterrows():
-            oi = chain[chain["strike"] == row.Strike]
-            total_gex["PUT"].append(-(oi["openInterest"].iloc[0] * row.Gamma))
-
-    option_absolute_plot = OpenBBFigure()
-    option_absolute_plot.add_bar(
-        x=total_gex["Strike"],
-        y=total_gex["CALL"],
-        name="CALL",
-        marker_color="green",
-        width=0.8,
-    )
-
-    option_absolute_plot.add_bar(
-        x=total_gex["Strike"],
-        y=total_gex["PUT"],
-        name="PUT",
-        marker_color="red",
-        width=0.8,
-    )
-
-    option_absolute_plot.add_vline_legend(
-        x=current_price,
-        name=f"Price: {current_price}",
-        line=dict(width=LINE_WIDTH, color="white"),
-    )
-
     htmlcode = widgets.h(5, description)
 
     htmlcode += plot_to_html_image(option_absolute_plot)
@@ -629,7 +476,7 @@ def stock_bond_correlation_plot(description: str = "Stock bond correlation") ->
     )
     try:
         for symbol in ["SPY", "TLT"]:
-            stocks[symbol] = stocks_helper.load(symbol, interval=interval, start_date=start_date)
+            stocks[symbol] = BarStore().load(symbol, interval, start_date).copy()
             stocks[symbol]['RSI'] = talib.RSI(stocks[symbol]["Close"], timeperiod=timeperiod)[timeperiod:]
 
         zscore = zscore_values(stocks["SPY"]["RSI"]/stocks["TLT"]["RSI"])
@@ -0,0 +1,76 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional, Tuple
+
+from plotly.utils import PlotlyJSONEncoder
+
+from snapshot_cache import CACHE_DIR, evict_least_recently_used
+
+RENDER_CACHE_DIR = os.environ.get("RENDER_CACHE_DIR", os.path.join(CACHE_DIR, "renders"))
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("RENDER_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def figure_fingerprint(figure_dict: dict, width: int, height: int, image_format: str) -> str:
+    """Stable hash of the figure's data and layout and the requested image size."""
+    payload = json.dumps(
+        {"data": figure_dict.get("data"), "layout": figure_dict.get("layout"), "size": [width, height]},
+        cls=PlotlyJSONEncoder,
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return f"{hashlib.sha256(payload.encode()).hexdigest()}.{image_format}"
+
+
+@dataclass
+class RenderCache:
+    """Rendered images on disk keyed by figure fingerprint, evicted least recently used first."""
+
+    directory: str = RENDER_CACHE_DIR
+    max_bytes: int = RENDER_CACHE_MAX_BYTES
+    hits: int = 0
+    misses: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def path(self, key: str) -> Path:
+        return Path(self.directory, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.path(key)
+        try:
+            image = path.read_bytes()
+            # mtime is the LRU clock
+            os.utime(path)
+        except (FileNotFoundError, OSError):
+            image = None
+        with self._lock:
+            if image is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return image
+
+    def put(self, key: str, image: bytes) -> None:
+        path = self.path(key)
+        tmp_path = path.with_name(f"{key}.{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(image)
+            os.replace(tmp_path, path)
+        except OSError as error:
+            logging.warning(f"Failed to cache render {key}: {error}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        evict_least_recently_used(self.directory, f"*{path.suffix}", self.max_bytes)
+
+    def take_stats(self) -> Tuple[int, int]:
+        """Hits and misses since the last call, counted again from zero."""
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            self.hits = self.misses = 0
+        return hits, misses
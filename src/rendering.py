@@ -0,0 +1,174 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import plotly
+from kaleido.scopes.plotly import PlotlyScope
+from plotly.basedatatypes import BaseFigure
+from plotly.graph_objects import Figure
+from plotly.io._utils import validate_coerce_fig_to_dict
+from plotly.offline import get_plotlyjs_version
+from plotly.utils import PlotlyJSONEncoder
+
+from render_cache import RenderCache, figure_fingerprint
+
+RENDER_POOL_SIZE = int(os.environ.get("RENDER_POOL_SIZE", 1))
+PLOTLYJS_PATH = os.path.join(os.path.dirname(os.path.abspath(plotly.__file__)), "package_data", "plotly.min.js")
+MATHJAX_URL = "https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.5/MathJax.js"
+
+OUTPUT_MODES = ["image", "interactive"]
+SIGNIFICANT_DIGITS = 6
+# a JSON number value, in an array or after a key, with more decimals than are kept; numbers inside strings, like the
+# seconds of a timestamp, are left alone
+LONG_FLOAT = re.compile(
+    rf"(?:(?<=[\[,])|(?<=\":))-?\d+\.\d{{{SIGNIFICANT_DIGITS + 1},}}(?:[eE][+-]?\d+)?(?=[,\]}}])"
+)
+_output_mode = "image"
+
+
+def set_output_mode(mode: str) -> None:
+    global _output_mode
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode {mode}, expected one of {OUTPUT_MODES}")
+    _output_mode = mode
+
+
+def output_mode() -> str:
+    return _output_mode
+
+
+def plotly_script() -> str:
+    """The single plotly.js bundle every interactive chart of a report draws with."""
+    return f'<script src="https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js" charset="utf-8"></script>'
+
+
+def figure_to_html_div(figure: Figure, width: int, height: int) -> str:
+    """Plotly div with the figure as compact JSON, no rasterization."""
+    figure.update_layout(width=width, height=height)
+    figure_json = json.dumps(figure.to_plotly_json(), cls=PlotlyJSONEncoder, separators=(",", ":"))
+    # cut float precision to what the screen can show, significant digits so small values keep theirs
+    figure_json = LONG_FLOAT.sub(lambda match: format(float(match.group()), f".{SIGNIFICANT_DIGITS}g"), figure_json)
+    # from the content, a report whose charts did not change is the same HTML and hashes the same
+    div_id = "figure-" + hashlib.sha256(figure_json.encode("utf-8")).hexdigest()[:16]
+    return (
+        f'<div id="{div_id}"></div>'
+        f'<script>Plotly.newPlot("{div_id}", {figure_json}, {{"displaylogo": false}});</script>'
+    )
+
+
+def overrides_image_export(figure: Figure) -> bool:
+    return any(getattr(type(figure), name) is not getattr(BaseFigure, name) for name in ("to_image", "write_image"))
+
+
+def export_image(figure: Figure, width: int, height: int, image_format: str) -> bytes:
+    """Image from the figure's own export, to_image or write_image, whichever its class overrides."""
+    if type(figure).to_image is not BaseFigure.to_image:
+        return figure.to_image(format=image_format, width=width, height=height)
+    buffer = io.BytesIO()
+    figure.write_image(buffer, format=image_format, width=width, height=height)
+    return buffer.getvalue()
+
+
+@dataclass
+class RenderResult:
+    image: bytes
+    seconds: float
+
+
+class Renderer:
+    """Pool of kaleido scopes, each keeping its chromium process warm between figures."""
+
+    def __init__(self, pool_size: int = RENDER_POOL_SIZE, cache: Optional[RenderCache] = None):
+        self.pool_size = pool_size
+        self.cache = cache
+        self._scopes: queue.Queue = queue.Queue()
+        for _ in range(pool_size):
+            scope = PlotlyScope(plotlyjs=PLOTLYJS_PATH, mathjax=MATHJAX_URL)
+            self._scopes.put(scope)
+
+    def render(self, figure: Figure, width: int, height: int, image_format: str = "png") -> RenderResult:
+        """The figure as an image, drawn by a pooled scope from its plotly dict, as write_image would draw it.
+
+        A figure class overriding plotly's image export is exported through it instead, without the pool or the
+        cache. OpenBBFigure does not override it: its theme and layout tweaks are applied when it is built and in
+        show(), so the dict rendered here is what its write_image would render.
+        """
+        start = time.perf_counter()
+        if overrides_image_export(figure):
+            image = export_image(figure, width, height, image_format)
+            return RenderResult(image=image, seconds=time.perf_counter() - start)
+        figure_dict = validate_coerce_fig_to_dict(figure, True)
+        if self.cache is not None:
+            key = figure_fingerprint(figure_dict, width, height, image_format)
+            image = self.cache.get(key)
+            if image is not None:
+                return RenderResult(image=image, seconds=time.perf_counter() - start)
+
+        scope = self._scopes.get()
+        try:
+            image = scope.transform(figure_dict, format=image_format, width=width, height=height)
+        finally:
+            self._scopes.put(scope)
+        if self.cache is not None:
+            self.cache.put(key, image)
+        return RenderResult(image=image, seconds=time.perf_counter() - start)
+
+    def warm_up(self) -> None:
+        """Start the chromium process of every scope, which kaleido otherwise does on the first figure."""
+        scopes = [self._scopes.get() for _ in range(self.pool_size)]
+        try:
+            for scope in scopes:
+                scope.transform({"data": [], "layout": {}}, format="png", width=10, height=10)
+        finally:
+            for scope in scopes:
+                self._scopes.put(scope)
+
+    def render_many(
+        self, figures: List[Figure], width: int, height: int, image_format: str = "png"
+    ) -> List[RenderResult]:
+        """Every figure of the batch across the pooled scopes, in order, logging what each took."""
+
+        def render(figure: Figure) -> RenderResult:
+            return self.render(figure, width, height, image_format)
+
+        if self.pool_size > 1 and len(figures) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.pool_size, len(figures))) as executor:
+                results = list(executor.map(render, figures))
+        else:
+            results = [render(figure) for figure in figures]
+        logging.info(
+            f"Rendered {len(results)} figures in {sum(result.seconds for result in results):.2f}s: "
+            + ", ".join(f"{result.seconds:.2f}s" for result in results)
+        )
+        return results
+
+
+_renderer: Optional[Renderer] = None
+
+
+def get_renderer() -> Renderer:
+    """Renderer of the current process, started on first use."""
+    global _renderer
+    if _renderer is None:
+        _renderer = Renderer(cache=RenderCache())
+    return _renderer
+
+
+def take_render_cache_stats() -> Tuple[int, int]:
+    """Render cache hits and misses of this process since the last call."""
+    if _renderer is None or _renderer.cache is None:
+        return 0, 0
+    return _renderer.cache.take_stats()
+
+
+def log_render_cache_stats(label: str, hits: int, misses: int) -> None:
+    if hits or misses:
+        logging.info(f"Render cache for {label}: {hits} hits, {misses} misses")
@@ -1,30 +1,262 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields
+import heapq
+import json
 import logging
-from typing import List
-from concurrent.futures import ProcessPoolExecutor, as_completed
+import os
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from openbb_terminal.reports import widget_helpers as widgets
+import rendering
+from market_data import MarketData
 from reports.base import Report
+from retry import with_retry
+from snapshot_cache import CACHE_DIR
+from worker_pool import WarmUpSavings, pool_size, start_pool, stop_pool, warm_up_cost
+
+SECTION_TIMINGS_PATH = os.path.join(CACHE_DIR, "section_timings.json")
+# seconds assumed for a section kind until a run has measured it
+DEFAULT_SECTION_SECONDS = {
+    "rsi_call": 4.0,
+    "rsi_put": 4.0,
+    "stock_bond_correlation": 4.0,
+    "long_period": 2.0,
+    "one_day": 2.0,
+}
+DEFAULT_SECONDS = 1.0
+# pseudo-section loading a symbol's data and listing its sections, it unlocks all the others
+PLAN = "plan"
+# html, seconds taken or None when it failed, (render cache hits, misses)
+SectionResult = Tuple[str, Optional[float], Tuple[int, int]]
+
+
+class SectionTimings:
+    """Last measured seconds per (symbol, section), kept between runs to schedule the longest sections first."""
+
+    def __init__(self, path: str = SECTION_TIMINGS_PATH):
+        self.path = path
+        try:
+            with open(path, encoding="utf-8") as fh:
+                self.seconds: Dict[str, float] = json.load(fh)
+        except (FileNotFoundError, OSError, ValueError):
+            self.seconds = {}
+
+    def estimate(self, symbol: str, section: str) -> float:
+        default = DEFAULT_SECTION_SECONDS.get(section.split(" ")[0], DEFAULT_SECONDS)
+        return self.seconds.get(f"{symbol} {section}", default)
+
+    def record(self, symbol: str, section: str, seconds: float) -> None:
+        self.seconds[f"{symbol} {section}"] = round(seconds, 3)
+
+    def save(self) -> None:
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump(self.seconds, fh, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as error:
+            logging.warning(f"Failed to store section timings: {error}")
+
 
 @dataclass
 class AsyncReport(Report):
     multiprocessing: bool = False
+    # warm pool and its size handed in by a long running caller, left running after the report; None starts and
+    # stops a pool for this report alone
+    pool: Optional[Tuple[ProcessPoolExecutor, int]] = field(default=None, init=False, repr=False)
+
+    def parameters(self) -> dict:
+        """Constructor arguments, enough for a worker to build its own copy of the report."""
+        return {field.name: getattr(self, field.name) for field in fields(self) if field.init}
+
+    def title(self, symbol: str) -> str:
+        return widgets.h(1, f"Simple analysis for {symbol}:")
 
-    def process_futures(self, futures):
-        for future in as_completed(futures):
-            try:
-                htmlcode, symbol = future.result()
-                self.body += widgets.add_tab(symbol, htmlcode)
-            except TypeError as errors:
-                logging.warning(f"Failed to process {symbol}: {errors}")
+    def sections(self, market: MarketData) -> List[str]:
+        """Names of the independent sections of a symbol's tab, in the order they are shown."""
+        return []
+
+    def prepare(self, market: MarketData) -> None:
+        """Load what several sections share once, so they find it in the cache."""
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        raise NotImplementedError(section)
+
+    def process_symbol(self, symbol: str) -> Tuple[str, str]:
+        market = MarketData(symbol)
+        self.prepare(market)
+        sections = [self.render_section(market, section) for section in self.sections(market)]
+        return self.title(symbol) + "".join(sections), symbol
+
+    def plan_symbol(self, symbol: str) -> Tuple[List[str], float]:
+        """Sections of a symbol and the time its snapshots were loaded at, the sections read exactly those."""
+        rendering.set_output_mode(self.output)
+        market = MarketData(symbol, as_of=time.time())
+        self.prepare(market)
+        return self.sections(market), market.as_of
+
+    def run_section(self, symbol: str, section: str, as_of: float) -> SectionResult:
+        """Section html, its seconds (None when it failed) and render cache use, run in a worker on its plan's data."""
+        rendering.set_output_mode(self.output)
+        market = MarketData(symbol, as_of=as_of)
+        start = time.perf_counter()
+        rendering.take_render_cache_stats()
+        try:
+            # retried on its own, the data stages it already finished stay memoized in market
+            htmlcode = with_retry(f"{symbol} {section}", lambda: self.render_section(market, section))
+        except Exception as error:
+            logging.error(f"Failed to render {symbol} {section}: {error!r}")
+            return widgets.h(5, f"Error for {symbol} {section}: {error}"), None, rendering.take_render_cache_stats()
+        return htmlcode, time.perf_counter() - start, rendering.take_render_cache_stats()
 
     def process_async(self):
-        with ProcessPoolExecutor(max_workers=len(self.tickers)) as executor:
-            futures = [
-                executor.submit(self.retry_processing, symbol)
-                for symbol in self.tickers
-            ]
-            self.process_futures(futures)
+        """Run every section of every symbol across the pool, longest first, writing a tab once its sections are in.
+
+        Sections still missing when their ticker's or the run's deadline passes get placeholders; work already
+        running cannot be interrupted in a worker, it is abandoned. Once abandoned work holds every worker the pool
+        is replaced, otherwise the workers are stopped at the end.
+        """
+        self.start_writer()
+        budget = self.budget
+        timings = SectionTimings()
+        planned: Dict[str, List[str]] = {}
+        # time each symbol's snapshots were loaded at by its plan
+        as_of: Dict[str, float] = {}
+        finished: Dict[str, Dict[str, str]] = {symbol: {} for symbol in self.tickers}
+        # (-estimated seconds, submission order, symbol, section)
+        ready = [(-float("inf"), order, symbol, PLAN) for order, symbol in enumerate(self.tickers)]
+        heapq.heapify(ready)
+        order = len(ready)
+        running = {}
+        # timed out tasks still occupying a worker
+        abandoned = set()
+        parameters = self.parameters()
+        # render cache use summed over the sections, each counted in its worker
+        cache_hits = cache_misses = 0
+        warm_ups = WarmUpSavings()
+
+        def write_tab(symbol: str) -> None:
+            sections = finished.pop(symbol)
+            self.add_tab(symbol, self.title(symbol) + "".join(sections[name] for name in planned[symbol]))
+
+        def expire(symbol: str) -> None:
+            nonlocal ready
+            for future, (running_symbol, _) in list(running.items()):
+                if running_symbol == symbol:
+                    del running[future]
+                    if not future.cancel():
+                        abandoned.add(future)
+            ready = [task for task in ready if task[2] != symbol]
+            heapq.heapify(ready)
+
+            self.incomplete.append(symbol)
+            if symbol not in planned:
+                budget.record(symbol, PLAN)
+                finished.pop(symbol)
+                self.add_tab(symbol, self.timed_out_tab(symbol))
+                return
+            for section in planned[symbol]:
+                if section not in finished[symbol]:
+                    seconds = budget.record(symbol, section)
+                    timings.record(symbol, section, max(seconds, timings.estimate(symbol, section)))
+                    finished[symbol][section] = widgets.h(5, f"{symbol} {section} timed out after {seconds:.0f}s")
+            write_tab(symbol)
 
+        executor, workers = self.pool or start_report_pool(self.output)
+
+        def replace_pool() -> None:
+            nonlocal executor, order
+            logging.warning(f"All {workers} workers are stuck on timed out sections, replacing the pool")
+            for symbol, section in running.values():
+                order += 1
+                priority = -float("inf") if section == PLAN else -timings.estimate(symbol, section)
+                heapq.heappush(ready, (priority, order, symbol, section))
+            running.clear()
+            abandoned.clear()
+            stop_pool(executor)
+            executor = start_pool(workers, self.output)
+            if self.pool is not None:
+                self.pool = executor, workers
+
+        try:
+            while (ready or running) and not budget.expired():
+                if ready and len(abandoned) >= workers:
+                    replace_pool()
+                # tasks are held back here rather than queued in the executor, so sections planned later can
+                # still overtake shorter ones
+                while ready and len(running) + len(abandoned) < workers:
+                    _, _, symbol, section = heapq.heappop(ready)
+                    if section == PLAN:
+                        budget.start_ticker(symbol)
+                        future = executor.submit(plan_task, type(self), parameters, symbol)
+                    else:
+                        future = executor.submit(section_task, type(self), parameters, symbol, section, as_of[symbol])
+                    running[future] = (symbol, section)
+
+                in_flight = {symbol for symbol, _ in running.values()}
+                done, _ = wait(
+                    set(running) | abandoned, timeout=budget.remaining(in_flight), return_when=FIRST_COMPLETED
+                )
+                abandoned -= done
+                for future in done & set(running):
+                    symbol, section = running.pop(future)
+                    try:
+                        result, worker = future.result()
+                        warm_ups.record(worker)
+                    except Exception as error:
+                        logging.warning(f"Failed to process {symbol} {section}: {error}")
+                        if section == PLAN:
+                            self.incomplete.append(symbol)
+                            finished.pop(symbol)
+                            self.add_tab(symbol, widgets.h(1, f"Error for {symbol}: {error}"))
+                            continue
+                        result = widgets.h(5, f"Error for {symbol} {section}: {error}"), None, (0, 0)
+
+                    if section == PLAN:
+                        planned[symbol], as_of[symbol] = result
+                        for name in planned[symbol]:
+                            order += 1
+                            heapq.heappush(ready, (-timings.estimate(symbol, name), order, symbol, name))
+                    else:
+                        htmlcode, seconds, (hits, misses) = result
+                        cache_hits += hits
+                        cache_misses += misses
+                        # a failure says nothing about how long the section takes, the last estimate stays
+                        if seconds is not None:
+                            timings.record(symbol, section, seconds)
+                        else:
+                            self.incomplete.append(symbol)
+                        finished[symbol][section] = htmlcode
+
+                    if len(finished[symbol]) == len(planned[symbol]):
+                        write_tab(symbol)
+
+                for symbol in [symbol for symbol in budget.ticker_started_at if symbol in finished]:
+                    if budget.expired(symbol):
+                        expire(symbol)
+
+            for symbol in [symbol for symbol in self.tickers if symbol in finished]:
+                expire(symbol)
+        except BaseException:
+            # workers lead their own process groups, an interrupt never reached them
+            stop_pool(executor)
+            self.pool = None
+            raise
+
+        if abandoned:
+            # a stalled worker would hold the shutdown and the exit
+            logging.warning(f"Stopping the pool, {len(abandoned)} workers are still busy with timed out sections")
+            stop_pool(executor)
+            self.pool = None
+        elif self.pool is None:
+            executor.shutdown()
+
+        rendering.log_render_cache_stats("the run", cache_hits, cache_misses)
+        warm_ups.log(len(self.tickers))
+        timings.save()
+        budget.save(f"{self.report_date} {self.report_time}")
 
     def process(self):
         if self.multiprocessing:
@@ -33,3 +265,32 @@ class AsyncReport(Report):
         else:
             logging.info(f"Processing report in normal mode...")
             super().process()
+
+
+# the report each worker last built per report type; tasks carry the parameters, so a pool kept between runs rebuilds
+# it when they change
+_worker_reports: Dict[type, Tuple[dict, AsyncReport]] = {}
+
+
+def worker_report(report_type: type, parameters: dict) -> AsyncReport:
+    built = _worker_reports.get(report_type)
+    if built is None or built[0] != parameters:
+        _worker_reports[report_type] = parameters, report_type(**parameters)
+    return _worker_reports[report_type][1]
+
+
+def start_report_pool(output: str) -> Tuple[ProcessPoolExecutor, int]:
+    """Warm pool able to run the sections of any report, with its number of workers."""
+    workers = pool_size()
+    return start_pool(workers, output), workers
+
+
+# tasks return their result with the warm-up cost of the worker that ran them, to tally what the warm-up saved
+def plan_task(report_type: type, parameters: dict, symbol: str) -> Tuple[Tuple[List[str], float], Tuple[int, float]]:
+    return worker_report(report_type, parameters).plan_symbol(symbol), warm_up_cost()
+
+
+def section_task(
+    report_type: type, parameters: dict, symbol: str, section: str, as_of: float
+) -> Tuple[SectionResult, Tuple[int, float]]:
+    return worker_report(report_type, parameters).run_section(symbol, section, as_of), warm_up_cost()
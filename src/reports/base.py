@@ -1,10 +1,15 @@
 import logging
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import pandas as pd
 import pytz
 from openbb_terminal.helper_funcs import get_user_timezone
 from openbb_terminal.reports import widget_helpers as widgets
+import rendering
+from deadline import Deadline
+from reports import fragments
+from reports.shards import Shard, ShardWriter
+from reports.writer import FragmentReportWriter, ReportWriter
 
 from dataclasses import dataclass
 
@@ -13,12 +18,49 @@ class Report:
     tickers : List[str]
     author: str
     report_title: str
-    report_date : str = pd.Timestamp.now(tz=pytz.timezone(get_user_timezone())).strftime("%Y-%m-%d")
-    report_time : str = pd.Timestamp.now(tz=pytz.timezone(get_user_timezone())).strftime("%H:%M")
-    body : str = None
+    # default to when the report is created, in the user's timezone
+    report_date : Optional[str] = None
+    report_time : Optional[str] = None
+    # "image" embeds rendered PNGs, "interactive" embeds plotly JSON drawn in the browser
+    output : str = "image"
+    # "single" writes one HTML file, "fragments" an index loading each tab's file on first click
+    layout : str = "single"
+    raports_dir : str = "reports"
+    # seconds the run and each ticker may take, what is missing then is replaced by placeholders
+    deadline : Optional[float] = None
+    ticker_deadline : Optional[float] = None
+    # set when this run is one of several splitting the tickers, tabs then go to the shard's directory
+    shard : Optional[Shard] = None
 
     def __post_init__(self) -> None:
-        self.body = widgets.header(
+        if self.report_date is None or self.report_time is None:
+            now = pd.Timestamp.now(tz=pytz.timezone(get_user_timezone()))
+            self.report_date = self.report_date or now.strftime("%Y-%m-%d")
+            self.report_time = self.report_time or now.strftime("%H:%M")
+        rendering.set_output_mode(self.output)
+        self.writer: Optional[ReportWriter] = None
+        self.budget = Deadline(self.deadline, self.ticker_deadline)
+        # symbols whose tab has a timeout or error placeholder in place of some of its content
+        self.incomplete: List[str] = []
+
+    def __getstate__(self) -> dict:
+        # workers get the report without the open output file
+        state = self.__dict__.copy()
+        state["writer"] = None
+        return state
+
+    def metadata(self) -> dict:
+        """What a merge needs to rebuild the report header."""
+        return {
+            "author": self.author,
+            "report_title": self.report_title,
+            "report_date": self.report_date,
+            "report_time": self.report_time,
+            "output": self.output,
+        }
+
+    def header(self) -> str:
+        htmlcode = widgets.header(
             self.author,
             self.report_date,
             self.report_time,
@@ -26,27 +68,67 @@ class Report:
             self.report_title,
             plotly_js=False,
         )
-        self.body += '<a id="top"></a>'
-        self.body += widgets.tablinks(self.tickers)
-
+        if self.output == "interactive":
+            htmlcode += rendering.plotly_script()
+        # tab scripts go first so a partially written report can already switch tabs
+        htmlcode += widgets.tab_clickable_and_save_evt()
+        if self.layout == "fragments":
+            htmlcode += fragments.lazy_tabs_script()
+        htmlcode += '<a id="top"></a>'
+        htmlcode += widgets.tablinks(self.tickers)
+        return htmlcode
 
     def process_symbol(self, symbol: str) -> Tuple[str, str]:
         htmlcode = widgets.h(1, f"Simple analysis for {symbol}:")
         return htmlcode, symbol
 
-    def retry_processing(self, symbol: str, retry: int=3) -> Tuple[str, str]:
+    def retry_processing(self, symbol: str) -> Tuple[str, str]:
+        # workers may be spawned without the parent's module state
+        rendering.set_output_mode(self.output)
         try:
+            # stages retry themselves, what gets here has run out of retries
             return self.process_symbol(symbol)
         except Exception as error:
-            if retry:
-                return self.retry_processing(symbol, retry - 1)
+            logging.error(f"Failed to process {symbol}: {error!r}")
+            self.incomplete.append(symbol)
             htmlcode = widgets.h(1, f"Error for {symbol}: {error}")
             return htmlcode, symbol
     
+    def timed_out_tab(self, symbol: str) -> str:
+        return widgets.h(1, f"{symbol} did not finish before the deadline")
+
     def process(self):
+        # a symbol cannot be interrupted here, the deadline is checked between symbols
+        self.start_writer()
         for symbol in self.tickers:
+            if self.budget.expired():
+                self.budget.record(symbol, "all")
+                self.incomplete.append(symbol)
+                self.add_tab(symbol, self.timed_out_tab(symbol))
+                continue
+            self.budget.start_ticker(symbol)
             htmlcode, symbol = self.retry_processing(symbol)
-            self.body += widgets.add_tab(symbol, htmlcode)
+            self.add_tab(symbol, htmlcode)
+        rendering.log_render_cache_stats("the run", *rendering.take_render_cache_stats())
+        self.budget.save(f"{self.report_date} {self.report_time}")
+
+    def start_writer(self, raports_dir: Optional[str] = None) -> ReportWriter:
+        """Open the output and write the header, once."""
+        if self.writer is None:
+            raports_dir = raports_dir or self.raports_dir
+            if self.shard is not None:
+                self.writer = ShardWriter(self.shard, self.metadata())
+            elif self.layout == "fragments":
+                self.writer = FragmentReportWriter(
+                    Path(raports_dir, self.report_date, self.report_time), Path(raports_dir, "assets")
+                )
+            else:
+                self.writer = ReportWriter(Path(self.report_file_full_path(raports_dir)))
+            self.writer.open(self.header())
+        return self.writer
+
+    def add_tab(self, symbol: str, htmlcode: str) -> None:
+        self.start_writer().add_tab(symbol, htmlcode)
 
     def report_file_full_path(self, raports_dir: str = "reports") -> str:
         file_path = Path(raports_dir, self.report_date)
@@ -55,16 +137,5 @@ class Report:
         file_path = str(file_path) + ".html"
         return file_path
 
-    def save_to_html(self, raports_dir: str = "reports") -> str:
-        self.body += '<a class="button" href="#top">Back to top</a>'
-        self.body += widgets.tab_clickable_and_save_evt()
-        stylesheet = widgets.html_report_stylesheet()
-        report = widgets.html_report(
-            title="Option Report", stylesheet=stylesheet, body=self.body
-        )
-        full_file_name = self.report_file_full_path(raports_dir)
-
-        with open(full_file_name, "w", encoding="utf-8") as fh:
-            fh.write(report)
-            logging.info(f"Saved: {full_file_name} \n\r")
-        return full_file_name
+    def save_to_html(self, raports_dir: Optional[str] = None) -> str:
+        return self.start_writer(raports_dir).close('<a class="button" href="#top">Back to top</a>')
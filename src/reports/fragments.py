@@ -0,0 +1,84 @@
+import base64
+import hashlib
+import os
+import re
+import uuid
+from pathlib import Path
+
+from openbb_terminal.reports import widget_helpers as widgets
+
+from snapshot_cache import safe_name
+
+INLINE_IMAGE = re.compile(r'<img src="data:image/(\w+);base64,([^"]+)"')
+
+
+def fragment_file_name(symbol: str) -> str:
+    return f"tab-{safe_name(symbol)}.html"
+
+
+def tab_placeholder(symbol: str) -> str:
+    """Empty tab filled from its fragment file the first time it is opened."""
+    return f'<div id="{symbol}" class="tabcontent" data-fragment="{fragment_file_name(symbol)}"></div>'
+
+
+def write_file_atomically(path: Path, content) -> None:
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    if isinstance(content, bytes):
+        tmp_path.write_bytes(content)
+    else:
+        tmp_path.write_text(content, encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+def store_images(htmlcode: str, assets_dir: Path, assets_href: str) -> str:
+    """Move inline images into files named by their content hash, so identical images are stored once."""
+    assets_dir.mkdir(parents=True, exist_ok=True)
+
+    def store(match: re.Match) -> str:
+        image_format, encoded = match.groups()
+        image = base64.b64decode(encoded)
+        file_name = f"{hashlib.sha256(image).hexdigest()[:32]}.{image_format}"
+        path = Path(assets_dir, file_name)
+        if not path.exists():
+            write_file_atomically(path, image)
+        return f'<img loading="lazy" src="{assets_href}/{file_name}"'
+
+    return INLINE_IMAGE.sub(store, htmlcode)
+
+
+def write_fragment(symbol: str, htmlcode: str, report_dir: Path, assets_dir: Path) -> Path:
+    """Tab of one symbol as its own file next to the index, images referenced relative to both."""
+    assets_href = Path(os.path.relpath(assets_dir, report_dir)).as_posix()
+    path = Path(report_dir, fragment_file_name(symbol))
+    write_file_atomically(path, widgets.add_tab(symbol, store_images(htmlcode, assets_dir, assets_href)))
+    return path
+
+
+def lazy_tabs_script() -> str:
+    """Wraps the widgets menu() so a tab fetches its fragment on first click."""
+    return """
+        <script>
+        const showTab = menu;
+        menu = function (evt, menu_name) {
+            showTab(evt, menu_name);
+            const tab = document.getElementById(menu_name);
+            if (!tab || !tab.dataset.fragment || tab.dataset.loaded) {
+                return;
+            }
+            tab.dataset.loaded = "true";
+            fetch(tab.dataset.fragment)
+                .then((response) => response.text())
+                .then((html) => {
+                    tab.innerHTML = new DOMParser().parseFromString(html, "text/html").body.firstElementChild.innerHTML;
+                    // scripts inserted through innerHTML do not run
+                    tab.querySelectorAll("script").forEach((inserted) => {
+                        const script = document.createElement("script");
+                        script.text = inserted.text;
+                        inserted.replaceWith(script);
+                    });
+                })
+                .catch(() => {
+                    delete tab.dataset.loaded;
+                });
+        };
+        </script>"""
@@ -2,11 +2,10 @@ from dataclasses import dataclass
 from datetime import datetime
 
 from openbb_terminal.reports import widget_helpers as widgets
-from openbb_terminal.stocks.options import yfinance_model
-from typing import Tuple
+from typing import List
 import options
 import plots
-from reports.base import Report
+from market_data import MarketData
 from reports.async_base import AsyncReport
 
 def should_include_friday(symbol: str):
@@ -21,95 +20,133 @@ class OptionReport(AsyncReport):
     narrow_price_range: float = 0.1
     wide_price_range: float = 0.3
 
-    def process_symbol(self, symbol: str) -> Tuple[str, str]:
-        htmlcode = widgets.h(1, f"Simple analysis for {symbol}:")
-        full_chain = yfinance_model.get_full_option_chain(symbol)
-        full_chain["strike"] = full_chain["strike"].astype(float)
-        current_price = yfinance_model.get_price(symbol)
-
-        expirations = options.filter_active_volume_expirations(
-            full_chain, filter_less_then=1000
-        )
-        htmlcode += plots.rsi_options_plot(symbol, expirations, False)
-        htmlcode += plots.rsi_options_plot(symbol, expirations)
-
-        levels = options.options_levels(full_chain, current_price)
-        htmlcode += plots.long_period_plot_with_extra_data(symbol, levels)
-        htmlcode += plots.one_day_plot_with_extra_data(symbol, levels)
-
-
-        price_range = self.narrow_price_range if symbol in ["SPY", "QQQ"] else self.wide_price_range
-
-        htmlcode += plots.absolute_options_concentration_plot(
-            full_chain,
-            current_price,
-            only_current_expiration=True,
-            concentration="openInterest",
-            price_range=price_range,
-        )
-
-        if should_include_friday(symbol):
-            htmlcode += plots.absolute_options_concentration_plot(
+    def expirations(self, market: MarketData) -> List[str]:
+        return options.filter_active_volume_expirations(market.chain, filter_less_then=1000)
+
+    def price_range(self, symbol: str) -> float:
+        return self.narrow_price_range if symbol in ["SPY", "QQQ"] else self.wide_price_range
+
+    def sections(self, market: MarketData) -> List[str]:
+        friday = should_include_friday(market.symbol)
+        return [
+            "rsi_call",
+            "rsi_put",
+            "long_period",
+            "one_day",
+            "oi_current",
+            *(["oi_friday"] if friday else []),
+            "oi_all",
+            "gex_current",
+            *(["gex_friday"] if friday else []),
+            "expiration_concentration",
+        ]
+
+    def prepare(self, market: MarketData) -> None:
+        expirations = self.expirations(market)
+        plots.prefetch_rsi_histories(market, expirations, expirations)
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        full_chain = market.chain
+        current_price = market.price
+        price_range = self.price_range(market.symbol)
+
+        if section == "rsi_call":
+            return plots.rsi_options_plot(market, self.expirations(market), False)
+        if section == "rsi_put":
+            return plots.rsi_options_plot(market, self.expirations(market))
+        if section == "long_period":
+            return plots.long_period_plot_with_extra_data(market, options.options_levels(full_chain, current_price))
+        if section == "one_day":
+            return plots.one_day_plot_with_extra_data(market, options.options_levels(full_chain, current_price))
+        if section == "oi_current":
+            return plots.absolute_options_concentration_plot(
+                full_chain,
+                current_price,
+                only_current_expiration=True,
+                concentration="openInterest",
+                price_range=price_range,
+            )
+        if section == "oi_friday":
+            return plots.absolute_options_concentration_plot(
                 full_chain,
                 current_price,
                 only_next_friday_expiration=True,
                 concentration="openInterest",
                 price_range=price_range,
             )
-
-        htmlcode += plots.absolute_options_concentration_plot(
-            full_chain, current_price, concentration="openInterest", price_range=price_range
-        )
-
-        htmlcode += plots.options_gex_plot(full_chain, current_price, only_current_expiration=True)
-        if should_include_friday(symbol):
-            htmlcode += plots.options_gex_plot(
+        if section == "oi_all":
+            return plots.absolute_options_concentration_plot(
+                full_chain, current_price, concentration="openInterest", price_range=price_range
+            )
+        if section == "gex_current":
+            return plots.options_gex_plot(full_chain, current_price, only_current_expiration=True)
+        if section == "gex_friday":
+            return plots.options_gex_plot(
                 full_chain, current_price, only_next_friday_expiration=True, price_range=2*price_range,
             )
-        htmlcode += plots.expiration_concentration_plot(
-            full_chain, concentration="openInterest"
-        )
-
-        return htmlcode, symbol
+        if section == "expiration_concentration":
+            return plots.expiration_concentration_plot(
+                full_chain, concentration="openInterest"
+            )
+        raise ValueError(f"Unknown section {section}")
 
 
 @dataclass
 class OptionReportV2(AsyncReport):
     narrow_price_range: float = 0.1
     wide_price_range: float = 0.3
-    def process_symbol(self, symbol: str) -> Tuple[str, str]:
-        htmlcode = widgets.h(1, f"Analysis for {symbol}:")
-        full_chain = yfinance_model.get_full_option_chain(symbol)
-        full_chain["strike"] = full_chain["strike"].astype(float)
-        current_price = yfinance_model.get_price(symbol)
-
-        expirations = options.filter_active_open_interest_expirations_in_chain(full_chain, "call")
-        htmlcode += plots.rsi_options_plot(symbol, expirations, False)
-        
-        expirations = options.filter_active_open_interest_expirations_in_chain(full_chain, "put")
-        htmlcode += plots.rsi_options_plot(symbol, expirations)
-
-        price_range = self.narrow_price_range if symbol in ["SPY", "QQQ"] else self.wide_price_range
-        htmlcode += plots.detailed_option_plot(
-            full_chain[full_chain["expiration"] == expirations[0]],
-            current_price,
-            price_range=price_range,
-            description=f"Overview {symbol} {expirations[0]} {int(current_price)}",
-        )
-        htmlcode += plots.options_gex_plot_v2(
-            full_chain[full_chain["expiration"] == expirations[0]],
-            current_price,
-            price_range=price_range,
-            description=f"Overview GEX {symbol} {expirations[0]} {int(current_price)}",
-        )
-
-        htmlcode += plots.long_period_plot_with_extra_data(symbol)
-
-        htmlcode += plots.expiration_concentration_plot(
-            full_chain, concentration="openInterest"
-        )
-
-        if symbol == "SPY":
-            htmlcode += plots.stock_bond_correlation_plot()
-
-        return htmlcode, symbol
\ No newline at end of file
+
+    def title(self, symbol: str) -> str:
+        return widgets.h(1, f"Analysis for {symbol}:")
+
+    def price_range(self, symbol: str) -> float:
+        return self.narrow_price_range if symbol in ["SPY", "QQQ"] else self.wide_price_range
+
+    def call_expirations(self, market: MarketData) -> List[str]:
+        return options.filter_active_open_interest_expirations_in_chain(market.chain, "call")
+
+    def put_expirations(self, market: MarketData) -> List[str]:
+        return options.filter_active_open_interest_expirations_in_chain(market.chain, "put")
+
+    def sections(self, market: MarketData) -> List[str]:
+        sections = ["rsi_call", "rsi_put", "detailed_oi", "gex", "long_period", "expiration_concentration"]
+        if market.symbol == "SPY":
+            sections.append("stock_bond_correlation")
+        return sections
+
+    def prepare(self, market: MarketData) -> None:
+        plots.prefetch_rsi_histories(market, self.call_expirations(market), self.put_expirations(market))
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        symbol = market.symbol
+        current_price = market.price
+
+        if section == "rsi_call":
+            return plots.rsi_options_plot(market, self.call_expirations(market), False)
+        if section == "rsi_put":
+            return plots.rsi_options_plot(market, self.put_expirations(market))
+        if section == "detailed_oi":
+            expiration = self.put_expirations(market)[0]
+            return plots.detailed_option_plot(
+                market.expiration_chain(expiration),
+                current_price,
+                price_range=self.price_range(symbol),
+                description=f"Overview {symbol} {expiration} {int(current_price)}",
+            )
+        if section == "gex":
+            expiration = self.put_expirations(market)[0]
+            return plots.options_gex_plot_v2(
+                market.expiration_chain(expiration),
+                current_price,
+                price_range=self.price_range(symbol),
+                description=f"Overview GEX {symbol} {expiration} {int(current_price)}",
+            )
+        if section == "long_period":
+            return plots.long_period_plot_with_extra_data(market)
+        if section == "expiration_concentration":
+            return plots.expiration_concentration_plot(
+                market.chain, concentration="openInterest"
+            )
+        if section == "stock_bond_correlation":
+            return plots.stock_bond_correlation_plot()
+        raise ValueError(f"Unknown section {section}")
@@ -0,0 +1,86 @@
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Tuple
+
+from reports import fragments
+from reports.writer import ReportWriter
+
+
+@dataclass(frozen=True)
+class Shard:
+    """One of count runs splitting the ticker list, each writing its tabs to the shared directory."""
+
+    index: int
+    count: int
+    # the whole ticker list, in report order
+    tickers: Tuple[str, ...]
+    directory: str
+    # the same for every shard of a run
+    run_id: str
+
+    @classmethod
+    def parse(cls, value: str, tickers: List[str], directory: str, run_id: str) -> "Shard":
+        """Shard from "i/N", i counted from 0."""
+        index, count = (int(part) for part in value.split("/"))
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Shard {value} is not i/N with 0 <= i < N")
+        return cls(index, count, tuple(tickers), directory, run_id)
+
+    def own_tickers(self) -> List[str]:
+        # every count-th ticker, neighbours in the list usually cost alike so shards stay balanced
+        return list(self.tickers[self.index :: self.count])
+
+    def manifest_path(self) -> Path:
+        return Path(self.directory, f"shard-{self.index}-of-{self.count}.json")
+
+
+class ShardWriter(ReportWriter):
+    """Writes each tab of a shard as a fragment in the shared directory, with a manifest listing what is done.
+
+    The manifest is rewritten after every tab, so a merge can tell a finished shard from a lost one.
+    """
+
+    def __init__(self, shard: Shard, metadata: dict):
+        super().__init__(shard.manifest_path())
+        self.shard = shard
+        self.metadata = metadata
+        self.fragments = {}
+
+    def write_manifest(self, complete: bool) -> None:
+        manifest = {
+            **self.metadata,
+            "run_id": self.shard.run_id,
+            "index": self.shard.index,
+            "count": self.shard.count,
+            "tickers": list(self.shard.tickers),
+            "fragments": self.fragments,
+            "complete": complete,
+        }
+        fragments.write_file_atomically(self.path, json.dumps(manifest, indent=2))
+
+    def open(self, header: str) -> None:
+        # the page header is written by the merge
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.write_manifest(complete=False)
+
+    def add_tab(self, symbol: str, htmlcode: str) -> None:
+        file_name = fragments.fragment_file_name(symbol)
+        fragments.write_file_atomically(Path(self.shard.directory, file_name), htmlcode)
+        self.fragments[symbol] = file_name
+        self.count_tab(symbol, htmlcode)
+        self.write_manifest(complete=False)
+
+    def close(self, footer: str = "") -> str:
+        self.write_manifest(complete=True)
+        logging.info(f"Saved: shard {self.shard.index}/{self.shard.count} to {self.path} with {self.tabs} tabs")
+        return str(self.path)
+
+
+def load_manifests(directory: Path) -> List[dict]:
+    manifests = []
+    for path in sorted(directory.glob("shard-*-of-*.json")):
+        with open(path, encoding="utf-8") as fh:
+            manifests.append(json.load(fh))
+    return manifests
@@ -0,0 +1,74 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, Optional, TextIO, Tuple
+
+from openbb_terminal.reports import widget_helpers as widgets
+
+from reports import fragments
+
+BODY_MARKER = "<!--report-body-->"
+
+
+def page_parts(title: str) -> Tuple[str, str]:
+    """widgets.html_report page split around its body, so the body can be streamed in between."""
+    page = widgets.html_report(title=title, stylesheet=widgets.html_report_stylesheet(), body=BODY_MARKER)
+    prefix, suffix = page.split(BODY_MARKER)
+    return prefix, suffix
+
+
+class ReportWriter:
+    """Streams the report page to disk as tabs complete, flushing after each, so only one tab is held in memory
+    and a run killed midway leaves a readable report of the tabs done so far."""
+
+    def __init__(self, path: Path, title: str = "Option Report"):
+        self.path = path
+        self.title = title
+        self.tabs = 0
+        # hash of each tab's content, the header is left out as it carries the report time
+        self._tab_hashes: Dict[str, str] = {}
+        self._file: Optional[TextIO] = None
+        self._suffix = ""
+
+    def open(self, header: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        prefix, self._suffix = page_parts(self.title)
+        self._file = open(self.path, "w", encoding="utf-8")
+        self.write(prefix + header)
+
+    def write(self, htmlcode: str) -> None:
+        self._file.write(htmlcode)
+        self._file.flush()
+
+    def count_tab(self, symbol: str, htmlcode: str) -> None:
+        self._tab_hashes[symbol] = hashlib.sha256(htmlcode.encode("utf-8")).hexdigest()
+        self.tabs += 1
+
+    def content_hash(self) -> str:
+        """Hash of the tabs written, equal for two runs whose content did not change whatever order tabs finished in."""
+        return hashlib.sha256(json.dumps(self._tab_hashes, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def add_tab(self, symbol: str, htmlcode: str) -> None:
+        self.write(widgets.add_tab(symbol, htmlcode))
+        self.count_tab(symbol, htmlcode)
+
+    def close(self, footer: str = "") -> str:
+        self.write(footer + self._suffix)
+        self._file.close()
+        logging.info(f"Saved: {self.path} with {self.tabs} tabs \n\r")
+        return str(self.path)
+
+
+class FragmentReportWriter(ReportWriter):
+    """Index page with a placeholder per tab, each tab written to its own fragment file as it completes."""
+
+    def __init__(self, report_dir: Path, assets_dir: Path, title: str = "Option Report"):
+        super().__init__(Path(report_dir, "index.html"), title)
+        self.report_dir = report_dir
+        self.assets_dir = assets_dir
+
+    def add_tab(self, symbol: str, htmlcode: str) -> None:
+        fragments.write_fragment(symbol, htmlcode, self.report_dir, self.assets_dir)
+        self.write(fragments.tab_placeholder(symbol))
+        self.count_tab(symbol, htmlcode)
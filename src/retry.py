@@ -0,0 +1,67 @@
+import http.client
+import logging
+import random
+import time
+import urllib.error
+from dataclasses import dataclass
+from typing import Callable, Dict, TypeVar
+
+import requests
+
+T = TypeVar("T")
+
+NETWORK_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    urllib.error.URLError,
+    http.client.HTTPException,
+    requests.RequestException,
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    attempts: int
+    base_delay: float
+    max_delay: float
+
+    def delay(self, retry: int) -> float:
+        """Full jitter: uniform up to the exponential backoff, so workers failing together don't retry together."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**retry))
+
+
+# data providers throttle and drop connections, give them time
+NETWORK_RETRY = RetryPolicy(attempts=5, base_delay=1.0, max_delay=30.0)
+# a failed computation is rarely fixed by repeating it, one quick retry for flaky renders
+COMPUTE_RETRY = RetryPolicy(attempts=2, base_delay=0.5, max_delay=0.5)
+
+
+def is_network_error(error: Exception) -> bool:
+    return isinstance(error, NETWORK_ERRORS)
+
+
+def with_retry(stage: str, function: Callable[[], T]) -> T:
+    """Run one stage, retrying it alone under the policy matching each failure.
+
+    Attempts are counted per policy, the last error is raised once a policy runs out and is marked so that an
+    enclosing stage raises it straight away instead of repeating the retries.
+    """
+    failures: Dict[str, int] = {"network": 0, "compute": 0}
+    while True:
+        try:
+            return function()
+        except Exception as error:
+            if getattr(error, "retries_exhausted", False):
+                raise
+            kind = "network" if is_network_error(error) else "compute"
+            policy = NETWORK_RETRY if kind == "network" else COMPUTE_RETRY
+            failures[kind] += 1
+            if failures[kind] >= policy.attempts:
+                error.retries_exhausted = True
+                raise
+            delay = policy.delay(failures[kind] - 1)
+            logging.warning(
+                f"{stage} failed with {kind} error {error!r}, retry {failures[kind]}/{policy.attempts - 1} "
+                f"in {delay:.1f}s"
+            )
+            time.sleep(delay)
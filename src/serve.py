@@ -0,0 +1,169 @@
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import click
+import pytz
+
+from main import build_report, report_tickers, send_report
+from snapshot_cache import CACHE_DIR
+
+MARKET_TIMEZONE = os.environ.get("MARKET_TIMEZONE", "America/New_York")
+# content hash of the last report sent per report type, so a restart does not send it again
+SERVE_STATE_PATH = os.path.join(CACHE_DIR, "serve_state.json")
+
+
+def run_times(day: datetime, market_hours: str, every: timedelta) -> List[datetime]:
+    """Runs of a trading day: from the open every interval, and one at the close."""
+    opens, closes = (
+        day.replace(hour=int(at[:2]), minute=int(at[3:]), second=0, microsecond=0) for at in market_hours.split("-")
+    )
+    times = []
+    run_at = opens
+    while run_at < closes:
+        times.append(run_at)
+        run_at += every
+    return times + [closes]
+
+
+def next_run(now: datetime, market_hours: str, every: timedelta) -> datetime:
+    """First run after now, on weekdays during market hours; exchange holidays are not known."""
+    timezone = pytz.timezone(MARKET_TIMEZONE)
+    day = now.astimezone(timezone).replace(tzinfo=None)
+    for _ in range(8):
+        if day.weekday() < 5:
+            for run_at in run_times(day, market_hours, every):
+                run_at = timezone.localize(run_at)
+                if run_at > now:
+                    return run_at
+        day += timedelta(days=1)
+    raise ValueError(f"No run in a week for market hours {market_hours}")
+
+
+def load_state(path: str = SERVE_STATE_PATH) -> Dict[str, str]:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (FileNotFoundError, OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict[str, str], path: str = SERVE_STATE_PATH) -> None:
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(state, fh, sort_keys=True)
+        os.replace(tmp_path, path)
+    except OSError as error:
+        logging.warning(f"Failed to store serve state: {error}")
+
+
+class Server:
+    """Regenerates reports on a schedule in one resident process, sending a report only when its tabs changed.
+
+    Every report type runs its sections on one warm worker pool kept between cycles; the server process itself never
+    renders, so workers forked again after a deadline do not inherit a chromium process.
+    """
+
+    def __init__(self, report_types: List[str], send: bool, output: str, layout: str, deadline: Optional[float]):
+        self.report_types = report_types
+        self.send = send
+        self.options = {"output": output, "layout": layout}
+        # seconds a whole cycle may take
+        self.deadline = deadline
+        self.pool = None
+        self.state = load_state()
+
+    def report_deadline(self, cycle_started_at: float, index: int) -> Optional[float]:
+        """An even share of what is left of the cycle, a type finishing early leaves its time to the next ones."""
+        if self.deadline is None:
+            return None
+        remaining = self.deadline - (time.monotonic() - cycle_started_at)
+        return max(remaining, 0.0) / (len(self.report_types) - index)
+
+    def run_cycle(self) -> None:
+        from reports.async_base import start_report_pool
+
+        cycle_started_at = time.monotonic()
+        for index, report_type in enumerate(self.report_types):
+            # built just before it runs, its deadline starts counting here
+            report = build_report(
+                report_type,
+                report_tickers(report_type),
+                multiprocessing=True,
+                # types saved in the same minute would share a file name
+                raports_dir=os.path.join("reports", report_type),
+                deadline=self.report_deadline(cycle_started_at, index),
+                **self.options,
+            )
+            if self.pool is None:
+                self.pool = start_report_pool(self.options["output"])
+            report.pool = self.pool
+            try:
+                self.regenerate(report_type, report)
+            except Exception:
+                logging.exception(f"Failed to regenerate {report_type}")
+            # None once the report stopped workers stuck past its deadline, new ones are started for the next
+            self.pool = report.pool
+
+    def regenerate(self, report_type: str, report) -> None:
+        start = time.perf_counter()
+        report.process()
+        full_file_name = report.save_to_html()
+        if report.incomplete:
+            # neither sent nor kept as the content last sent
+            logging.warning(
+                f"{report_type} regenerated in {time.perf_counter() - start:.1f}s with placeholders for "
+                f"{', '.join(sorted(set(report.incomplete)))}, not sent"
+            )
+            return
+        content_hash = report.writer.content_hash()
+        if self.state.get(report_type) == content_hash:
+            outcome = "unchanged, not sent"
+        elif self.send:
+            send_report(full_file_name, self.options["layout"])
+            # the state is what was sent, a failed send is tried again next cycle
+            self.state[report_type] = content_hash
+            save_state(self.state)
+            outcome = "changed, sent"
+        else:
+            outcome = "changed, sending is off"
+        logging.info(f"{report_type} regenerated in {time.perf_counter() - start:.1f}s, {outcome}")
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool[0].shutdown()
+            self.pool = None
+
+
+@click.command()
+@click.option("--report_type", "report_types", multiple=True, default=["Normal"], help="Types of the reports to run")
+@click.option("--every", default=30, help="Minutes between runs during market hours")
+@click.option("--market-hours", default="09:30-16:00", help="Hours to run in, in MARKET_TIMEZONE, on weekdays")
+@click.option("--send", default=False, help="Send changed reports in to the bucket and by email")
+@click.option("--output", default="image", type=click.Choice(["image", "interactive"]))
+@click.option("--layout", default="single", type=click.Choice(["single", "fragments"]))
+@click.option("--deadline", type=float, default=None, help="Seconds a cycle may take, defaults to the interval")
+@click.option("--now", is_flag=True, default=False, help="Run once right away, before waiting for the schedule")
+def serve(report_types, every, market_hours, send, output, layout, deadline, now):
+    every = timedelta(minutes=every)
+    server = Server(list(report_types), send, output, layout, deadline or every.total_seconds())
+    try:
+        if now:
+            server.run_cycle()
+        while True:
+            run_at = next_run(datetime.now(pytz.utc), market_hours, every)
+            logging.info(f"Next run at {run_at}")
+            time.sleep(max((run_at - datetime.now(pytz.utc)).total_seconds(), 0))
+            server.run_cycle()
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,115 @@
+import logging
+import os
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+CACHE_DIR = os.environ.get("CACHE_DIR", "cache")
+CACHE_MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# seconds a snapshot of given kind stays fresh, fetch times are bucketed by it
+TTL_SECONDS = {
+    "chain": 15 * 60,
+    # chain with implied volatility solved, computed once per chain snapshot
+    "solved_chain": 15 * 60,
+    "price": 60,
+    "history": 60 * 60,
+}
+
+
+def safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value))
+
+
+def evict_least_recently_used(directory: str, pattern: str, max_bytes: int) -> None:
+    """Delete files matching pattern under directory, oldest mtime first, until they fit in max_bytes."""
+    files = []
+    for path in Path(directory).rglob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files, key=lambda item: item[0]):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+@dataclass
+class SnapshotCache:
+    """Local parquet snapshots keyed by (symbol, kind, expiration, fetch time bucket) with LRU eviction."""
+
+    directory: str = CACHE_DIR
+    max_bytes: int = CACHE_MAX_BYTES
+    ttl: Dict[str, int] = field(default_factory=lambda: dict(TTL_SECONDS))
+
+    def time_bucket(self, kind: str, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return int(now // self.ttl[kind])
+
+    def key_path(self, symbol: str, kind: str, expiration: str = "all", now: Optional[float] = None) -> Path:
+        bucket = self.time_bucket(kind, now)
+        return Path(self.directory, safe_name(symbol), kind, f"{safe_name(expiration)}-{bucket}.parquet")
+
+    def get(
+        self, symbol: str, kind: str, expiration: str = "all", now: Optional[float] = None
+    ) -> Optional[pd.DataFrame]:
+        path = self.key_path(symbol, kind, expiration, now)
+        try:
+            frame = pd.read_parquet(path)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        # mtime is the LRU clock
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # evicted by another process since the read, the frame is still good
+            pass
+        return frame
+
+    def put(
+        self, frame: pd.DataFrame, symbol: str, kind: str, expiration: str = "all", now: Optional[float] = None
+    ) -> None:
+        path = self.key_path(symbol, kind, expiration, now)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            frame.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as error:
+            logging.warning(f"Failed to cache {symbol} {kind} {expiration}: {error}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def get_or_fetch(
+        self,
+        symbol: str,
+        kind: str,
+        fetch: Callable[[], pd.DataFrame],
+        expiration: str = "all",
+        now: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """Snapshot of the bucket now falls in, fetched when missing; now defaults to the current time."""
+        frame = self.get(symbol, kind, expiration, now)
+        if frame is not None:
+            logging.debug(f"cache hit {symbol} {kind} {expiration}")
+            return frame
+        frame = fetch()
+        self.put(frame, symbol, kind, expiration, now)
+        return frame
+
+    def evict(self) -> None:
+        evict_least_recently_used(self.directory, "*.parquet", self.max_bytes)
@@ -1,18 +1,65 @@
+import logging
 import os
+import re
 from datetime import timedelta
+from pathlib import Path
+from typing import Dict
 
 from google.cloud import storage
 
+# relative links of a report page: tab fragments and image assets
+LOCAL_REFERENCE = re.compile(r'(src|data-fragment)="(?!data:|https?:|#)([^"]+)"')
 
-def upload_to_storage(source_file_path: str) -> str:
-    storage_client = storage.Client()
-    bucket_name = os.environ["BUCKET_NAME"]
-    bucket = storage_client.bucket(bucket_name)
-    blob = bucket.blob(source_file_path)
-    blob.upload_from_filename(source_file_path)
-    signed_url = blob.generate_signed_url(
+
+def sign(blob) -> str:
+    return blob.generate_signed_url(
         version="v2",
         expiration=timedelta(days=365),
         method="GET",
     )
-    return signed_url
+
+
+def get_bucket():
+    storage_client = storage.Client()
+    bucket_name = os.environ["BUCKET_NAME"]
+    return storage_client.bucket(bucket_name)
+
+
+def upload_file(bucket, path: Path, signed: Dict[Path, str]) -> str:
+    """Upload a file and whatever it links to, html links rewritten to signed urls since the bucket is private."""
+    path = path.resolve()
+    if path in signed:
+        return signed[path]
+
+    blob = bucket.blob(os.path.relpath(path))
+    if path.suffix == ".html":
+
+        def replace(match: re.Match) -> str:
+            attribute, reference = match.groups()
+            target = Path(path.parent, reference)
+            if not target.is_file():
+                return match.group(0)
+            return f'{attribute}="{upload_file(bucket, target, signed)}"'
+
+        html = LOCAL_REFERENCE.sub(replace, path.read_text(encoding="utf-8"))
+        blob.upload_from_string(html, content_type="text/html")
+    elif not blob.exists():
+        # content-addressed assets are uploaded once
+        blob.upload_from_filename(str(path))
+
+    signed[path] = sign(blob)
+    return signed[path]
+
+
+def upload_to_storage(source_path: str) -> str:
+    """Upload a report file, or a fragment report directory through its index, and return its signed url."""
+    bucket = get_bucket()
+    if os.path.isdir(source_path):
+        signed: Dict[Path, str] = {}
+        signed_url = upload_file(bucket, Path(source_path, "index.html"), signed)
+        logging.info(f"Uploaded {source_path} with {len(signed) - 1} linked files")
+        return signed_url
+
+    blob = bucket.blob(source_path)
+    blob.upload_from_filename(source_path)
+    return sign(blob)
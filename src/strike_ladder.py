@@ -0,0 +1,88 @@
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+LADDER_COLUMNS = ["volume_call", "volume_put", "openInterest_call", "openInterest_put"]
+
+
+class RangeArgMax:
+    """Sparse table answering "position of the largest value in [first, last]" in O(1) after O(n log n) build.
+
+    Ties resolve to the lowest position, like idxmax.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.table: List[np.ndarray] = [np.arange(len(values))]
+        width = 1
+        while 2 * width <= len(values):
+            previous = self.table[-1]
+            left, right = previous[: len(previous) - width], previous[width:]
+            self.table.append(np.where(values[right] > values[left], right, left))
+            width *= 2
+
+    def query(self, first: int, last: int) -> int:
+        level = int(last - first + 1).bit_length() - 1
+        left, right = self.table[level][first], self.table[level][last - (1 << level) + 1]
+        return right if self.values[right] > self.values[left] else left
+
+
+class StrikeLadder:
+    """Call and put volume/open interest aligned on one ascending strike axis, summed over expirations.
+
+    Put columns are negative, as they are drawn below the axis.
+    """
+
+    def __init__(self, chain: pd.DataFrame):
+        totals = (
+            chain.groupby(["strike", "optionType"], observed=True)[["volume", "openInterest"]]
+            .sum()
+            .unstack("optionType")
+            .reindex(columns=pd.MultiIndex.from_product([["volume", "openInterest"], ["call", "put"]]))
+        )
+        # keep strikes quoted on both sides
+        totals = totals.dropna()
+        self.strikes = totals.index.to_numpy(dtype=float)
+        self.columns = {
+            "volume_call": totals[("volume", "call")].to_numpy(dtype=float),
+            "volume_put": -totals[("volume", "put")].to_numpy(dtype=float),
+            "openInterest_call": totals[("openInterest", "call")].to_numpy(dtype=float),
+            "openInterest_put": -totals[("openInterest", "put")].to_numpy(dtype=float),
+        }
+        self._largest_call = {
+            concentration: RangeArgMax(self.columns[f"{concentration}_call"])
+            for concentration in ["volume", "openInterest"]
+        }
+        self._largest_put = {
+            concentration: RangeArgMax(-self.columns[f"{concentration}_put"])
+            for concentration in ["volume", "openInterest"]
+        }
+
+    def _positions(self, min_strike: float, max_strike: float) -> Tuple[int, int]:
+        return (
+            int(np.searchsorted(self.strikes, min_strike, side="left")),
+            int(np.searchsorted(self.strikes, max_strike, side="right")),
+        )
+
+    def window(self, min_strike: float, max_strike: float) -> pd.DataFrame:
+        first, stop = self._positions(min_strike, max_strike)
+        frame = pd.DataFrame({name: values[first:stop] for name, values in self.columns.items()})
+        frame.insert(0, "strike", self.strikes[first:stop])
+        return frame
+
+    def walls(
+        self, current_price: float, min_strike: float, max_strike: float, concentration: str = "volume"
+    ) -> Tuple[Optional[float], Optional[float]]:
+        """Largest put strike between min_strike and the price, largest call strike between the price and max_strike."""
+        put_wall = call_wall = None
+
+        first, stop = self._positions(min_strike, current_price)
+        if first < stop:
+            put_wall = self.strikes[self._largest_put[concentration].query(first, stop - 1)]
+
+        first, stop = self._positions(current_price, max_strike)
+        if first < stop:
+            call_wall = self.strikes[self._largest_call[concentration].query(first, stop - 1)]
+
+        return put_wall, call_wall
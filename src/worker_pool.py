@@ -0,0 +1,137 @@
+import importlib
+import logging
+import os
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import rendering
+
+# resident memory one worker needs: pandas, openbb, plotly and a kaleido chromium
+WORKER_MEMORY_BYTES = int(os.environ.get("WORKER_MEMORY_BYTES", 1024 * 1024 * 1024))
+REPORT_WORKERS = os.environ.get("REPORT_WORKERS")
+# imported by every worker before its first task
+PRELOAD_MODULES = ["pandas", "talib", "plotly", "openbb_terminal", "plots"]
+# seconds the warm-up of this process took, 0.0 outside a worker
+_warm_up_seconds = 0.0
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def available_memory_bytes() -> Optional[int]:
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as fh:
+            for line in fh:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def pool_size() -> int:
+    """Workers the machine can run side by side: one per cpu, as long as memory allows, REPORT_WORKERS overrides."""
+    if REPORT_WORKERS:
+        return max(1, int(REPORT_WORKERS))
+    workers = available_cpus()
+    memory = available_memory_bytes()
+    if memory is not None:
+        workers = min(workers, memory // WORKER_MEMORY_BYTES)
+    return max(1, workers)
+
+
+def warm_up_worker(output: str, initializer: Optional[Callable] = None, *initargs) -> None:
+    """Pool initializer, run once in each worker process: import the heavy modules and start the renderer before
+    the process takes its first task."""
+    global _warm_up_seconds
+    # lead a process group, so stopping the worker also stops the chromium processes its renderer starts
+    os.setpgrp()
+    start = time.perf_counter()
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    imports = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendering.set_output_mode(output)
+    if output == "image":
+        rendering.get_renderer().warm_up()
+    renderer = time.perf_counter() - start
+    logging.info(f"Worker {os.getpid()} warm, imports {imports:.1f}s and renderer {renderer:.1f}s paid once")
+    _warm_up_seconds = imports + renderer
+
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def warm_up_cost() -> Tuple[int, float]:
+    """Pid of this worker and the seconds its warm-up took, returned with each task's result."""
+    return os.getpid(), _warm_up_seconds
+
+
+class WarmUpSavings:
+    """Tasks each worker ran against what its warm-up cost, to show what paying it once per worker saves."""
+
+    def __init__(self):
+        # pid -> (warm-up seconds, tasks run)
+        self.workers: Dict[int, Tuple[float, int]] = {}
+
+    def record(self, worker: Tuple[int, float]) -> None:
+        pid, seconds = worker
+        self.workers[pid] = seconds, self.workers.get(pid, (seconds, 0))[1] + 1
+
+    def log(self, tickers: int) -> None:
+        """Compare the warm-ups paid with a cold start for every task, and for every ticker as with a process each."""
+        if not self.workers:
+            return
+        once = sum(seconds for seconds, _ in self.workers.values())
+        tasks = sum(count for _, count in self.workers.values())
+        per_task = sum(seconds * count for seconds, count in self.workers.values())
+        per_ticker = once / len(self.workers) * tickers
+        logging.info(
+            f"Warm-up paid once by {len(self.workers)} workers: {once:.1f}s; cold per task ({tasks} tasks) "
+            f"{per_task:.1f}s, saved {per_task - once:.1f}s; cold per ticker ({tickers} tickers) {per_ticker:.1f}s, "
+            f"saved {per_ticker - once:.1f}s"
+        )
+
+
+def start_pool(
+    workers: int, output: str, initializer: Optional[Callable] = None, initargs: tuple = ()
+) -> ProcessPoolExecutor:
+    """Process pool whose workers warm up as they start, each logging what it paid once."""
+    return ProcessPoolExecutor(
+        max_workers=workers, initializer=warm_up_worker, initargs=(output, initializer, *initargs)
+    )
+
+
+def signal_group(pid: int, signum: int) -> None:
+    try:
+        os.killpg(pid, signum)
+    except ProcessLookupError:
+        # not leading its group yet, or already gone
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def stop_pool(executor: ProcessPoolExecutor, timeout: float = 5.0) -> None:
+    """Shut the pool down without waiting for its tasks, stopping its own workers and the renderers they started."""
+    # the executor has no public list of its processes, and forgets it on shutdown
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        signal_group(process.pid, signal.SIGTERM)
+    stop_by = time.monotonic() + timeout
+    for process in processes:
+        process.join(max(stop_by - time.monotonic(), 0))
+        if process.is_alive():
+            signal_group(process.pid, signal.SIGKILL)
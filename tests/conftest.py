@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# caches, timings and timeouts written by the code under test stay out of the working tree
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="reports-tests-"))
@@ -0,0 +1,120 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import List
+
+import rendering
+from market_data import MarketData
+from reports import async_base
+from reports.async_base import AsyncReport, SectionTimings
+
+STALLED = "STALLED"
+FAILING = "FAILING"
+
+
+@dataclass
+class StallingReport(AsyncReport):
+    """One section per ticker, loading the STALLED ticker hangs as a stuck download would."""
+
+    def prepare(self, market: MarketData) -> None:
+        if market.symbol == STALLED:
+            time.sleep(3600)
+
+    def sections(self, market: MarketData) -> List[str]:
+        return ["only"]
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        return f"<p>{market.symbol} {section} done</p>"
+
+
+@dataclass
+class FailingReport(AsyncReport):
+    """A section that always fails next to one that renders."""
+
+    def sections(self, market: MarketData) -> List[str]:
+        return ["broken", "fine"]
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        if section == "broken":
+            raise ValueError("no data")
+        return f"<p>{market.symbol} {section} done</p>"
+
+
+@dataclass
+class CachedChartsReport(AsyncReport):
+    """Sections looking up a chart in the render cache of their worker, none is there."""
+
+    def sections(self, market: MarketData) -> List[str]:
+        return ["first", "second", "third"]
+
+    def render_section(self, market: MarketData, section: str) -> str:
+        rendering.get_renderer().cache.get(f"{market.symbol}-{section}.png")
+        return f"<p>{market.symbol} {section} done</p>"
+
+
+def test_ticker_deadline_replaces_a_pool_stuck_on_timed_out_sections(tmp_path, monkeypatch):
+    monkeypatch.setattr(async_base, "pool_size", lambda: 1)
+    report = StallingReport(
+        tickers=[STALLED, "SPY"],
+        author="author",
+        report_title="title",
+        output="interactive",
+        raports_dir=str(tmp_path),
+        multiprocessing=True,
+        ticker_deadline=2.0,
+    )
+
+    # in a thread, so a hang fails the test instead of blocking it
+    processing = threading.Thread(target=report.process, daemon=True)
+    processing.start()
+    processing.join(60)
+    assert not processing.is_alive(), "the report waited on the stalled worker"
+
+    htmlcode = open(report.save_to_html(), encoding="utf-8").read()
+    assert f"{STALLED} did not finish before the deadline" in htmlcode
+    assert "SPY only done" in htmlcode
+    assert report.incomplete == [STALLED]
+
+
+def test_failed_sections_keep_their_last_timing(tmp_path):
+    timings = SectionTimings()
+    timings.record(FAILING, "broken", 7.0)
+    timings.save()
+    report = FailingReport(
+        tickers=[FAILING],
+        author="author",
+        report_title="title",
+        output="interactive",
+        raports_dir=str(tmp_path),
+        multiprocessing=True,
+    )
+
+    report.process()
+
+    htmlcode = open(report.save_to_html(), encoding="utf-8").read()
+    assert f"Error for {FAILING} broken: no data" in htmlcode
+    assert report.incomplete == [FAILING]
+    timings = SectionTimings()
+    assert timings.estimate(FAILING, "broken") == 7.0
+    assert f"{FAILING} fine" in timings.seconds
+
+
+def test_render_cache_use_is_logged_once_for_the_run(tmp_path, caplog):
+    report = CachedChartsReport(
+        tickers=["SPY", "QQQ"],
+        author="author",
+        report_title="title",
+        output="interactive",
+        raports_dir=str(tmp_path),
+        multiprocessing=True,
+    )
+
+    with caplog.at_level("INFO"):
+        report.process()
+
+    assert [record.getMessage() for record in caplog.records if "Render cache" in record.getMessage()] == [
+        "Render cache for the run: 0 hits, 6 misses"
+    ]
+    # a plan and three sections per ticker, all run by warm workers
+    assert "cold per task (8 tasks)" in caplog.text
+    assert "cold per ticker (2 tickers)" in caplog.text
@@ -0,0 +1,80 @@
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import chains
+
+EXPIRATIONS = [f"2030-01-{day:02d}" for day in range(1, 9)]
+REQUEST_SECONDS = 0.1
+
+
+class SleepingTicker:
+    """yf.Ticker answering every request after REQUEST_SECONDS, counting the requests in flight."""
+
+    lock = threading.Lock()
+    in_flight = 0
+    most_in_flight = 0
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+
+    @property
+    def options(self):
+        return tuple(EXPIRATIONS)
+
+    def option_chain(self, expiration):
+        with self.lock:
+            SleepingTicker.in_flight += 1
+            SleepingTicker.most_in_flight = max(SleepingTicker.most_in_flight, SleepingTicker.in_flight)
+        time.sleep(REQUEST_SECONDS)
+        with self.lock:
+            SleepingTicker.in_flight -= 1
+        side = pd.DataFrame({column: [0] for column in chains.sorted_chain_columns})
+        return SimpleNamespace(calls=side, puts=side)
+
+
+@pytest.fixture(autouse=True)
+def sleeping_yahoo(monkeypatch):
+    monkeypatch.setattr(chains.yf, "Ticker", SleepingTicker)
+    SleepingTicker.most_in_flight = 0
+
+
+def timed(fetch) -> float:
+    start = time.perf_counter()
+    fetch()
+    return time.perf_counter() - start
+
+
+def test_expirations_are_fetched_concurrently():
+    sequential = timed(lambda: chains.get_full_option_chain("SPY", max_workers=1))
+    concurrent = timed(lambda: chains.get_full_option_chain("SPY"))
+
+    assert len(chains.get_full_option_chain("SPY")) == 2 * len(EXPIRATIONS)
+    assert sequential >= len(EXPIRATIONS) * REQUEST_SECONDS
+    assert concurrent < sequential / 2
+
+
+def test_symbols_fetched_together_share_the_request_cap(monkeypatch):
+    monkeypatch.setattr(chains, "_yahoo_requests", threading.BoundedSemaphore(3))
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(chains.get_full_option_chain, ["SPY", "QQQ", "IWM", "DIA"]))
+
+    assert SleepingTicker.most_in_flight == 3
+
+
+def test_pushed_chains_are_cached_for_the_reports(tmp_path, monkeypatch):
+    uploaded = []
+    monkeypatch.setitem(sys.modules, "storage", SimpleNamespace(upload_to_storage=uploaded.append))
+    monkeypatch.chdir(tmp_path)
+
+    chains.pull_and_push_to_bucket("PUSHED")
+    monkeypatch.setattr(chains, "get_full_option_chain", lambda symbol: pytest.fail("the pushed chain was not cached"))
+
+    assert len(uploaded) == 1
+    assert len(chains.get_cached_full_option_chain("PUSHED")) == 2 * len(EXPIRATIONS)
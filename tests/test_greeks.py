@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from openbb_terminal.stocks.options import op_helpers
+
+import greeks
+
+SPOT = 100.0
+RF = 0.05
+
+
+def fixed_chain() -> pd.DataFrame:
+    expiration = str(date.today() + timedelta(days=30))
+    strikes = np.arange(80.0, 125.0, 5.0)
+    # a smile, deep strikes priced at a higher volatility
+    vols = 0.2 + 0.5 * ((strikes - SPOT) / SPOT) ** 2
+    return pd.concat(
+        [
+            pd.DataFrame({"strike": strikes, "impliedVolatility": vols, "optionType": option_type})
+            for option_type in ["call", "put"]
+        ],
+        ignore_index=True,
+    ).assign(expiration=expiration)
+
+
+def test_chain_greeks_match_op_helpers():
+    chain = fixed_chain()
+    calls, puts = (chain[chain["optionType"] == option_type] for option_type in ["call", "put"])
+
+    expected = op_helpers.get_greeks(SPOT, calls, puts, chain["expiration"].iloc[0], rf=RF, show_extra_greeks=True)
+    actual = greeks.chain_greeks(chain, SPOT, rf=RF)
+
+    for column in greeks.GREEK_COLUMNS:
+        np.testing.assert_allclose(actual[column].to_numpy(), expected[column].to_numpy(), rtol=1e-6, atol=1e-9)
@@ -0,0 +1,45 @@
+import pandas as pd
+
+import chains
+import greeks
+import market_data
+from market_data import MarketData
+from snapshot_cache import SnapshotCache
+
+
+def test_sections_read_the_snapshot_their_plan_loaded(tmp_path, monkeypatch):
+    calls = {"fetch": 0, "solve": 0}
+
+    def fetch_chain(symbol):
+        calls["fetch"] += 1
+        return pd.DataFrame(
+            {
+                "expiration": ["2030-01-18", "2030-01-18"],
+                "optionType": ["put", "call"],
+                "strike": [100.0, 100.0],
+                "lastPrice": [1.0, 2.0],
+                "fetch": [calls["fetch"]] * 2,
+            }
+        )
+
+    def solve(chain, price):
+        calls["solve"] += 1
+        return chain.assign(impliedVolatility=0.2)
+
+    monkeypatch.setattr(chains, "get_full_option_chain", fetch_chain)
+    monkeypatch.setattr(market_data, "fetch_price", lambda symbol: 100.0)
+    monkeypatch.setattr(greeks, "with_solved_implied_volatility", solve)
+    cache = SnapshotCache(directory=str(tmp_path))
+    # the last second of a chain bucket, the sections start in the next one
+    as_of = cache.ttl["chain"] * 1000 - 1.0
+
+    plan = MarketData("SPY", as_of=as_of, cache=cache)
+    assert len(plan.chain) == 2
+    sections = [MarketData("SPY", as_of=as_of, cache=cache) for _ in range(3)]
+    for section in sections:
+        assert list(section.chain.frame["fetch"]) == [1, 1]
+        assert list(section.chain.frame["optionType"]) == ["call", "put"]
+        assert section.price == 100.0
+
+    assert calls == {"fetch": 1, "solve": 1}
+    assert MarketData("SPY", as_of=as_of + 1.0, cache=cache).raw_chain["fetch"].iloc[0] == 2
@@ -0,0 +1,41 @@
+import click
+import pytest
+
+from merge import merge_shards
+from reports.shards import Shard, ShardWriter
+
+TICKERS = ["SPY", "QQQ"]
+METADATA = {
+    "author": "author",
+    "report_title": "title",
+    "report_date": "2024-01-02",
+    "report_time": "10:00",
+    "output": "interactive",
+}
+
+
+def write_shard(directory, index: int, run_id: str) -> None:
+    shard = Shard.parse(f"{index}/2", TICKERS, str(directory), run_id)
+    writer = ShardWriter(shard, METADATA)
+    writer.open("")
+    for symbol in shard.own_tickers():
+        writer.add_tab(symbol, f"<p>{symbol} of {run_id}</p>")
+    writer.close()
+
+
+def test_shards_of_one_run_are_merged(tmp_path):
+    write_shard(tmp_path / "shards", 0, "run1")
+    write_shard(tmp_path / "shards", 1, "run1")
+
+    htmlcode = open(merge_shards(tmp_path / "shards", raports_dir=str(tmp_path)), encoding="utf-8").read()
+
+    assert "<p>SPY of run1</p>" in htmlcode
+    assert "<p>QQQ of run1</p>" in htmlcode
+
+
+def test_shards_of_different_runs_are_not_merged(tmp_path):
+    write_shard(tmp_path / "shards", 0, "run1")
+    write_shard(tmp_path / "shards", 1, "run2")
+
+    with pytest.raises(click.ClickException, match="run1.*run2"):
+        merge_shards(tmp_path / "shards", raports_dir=str(tmp_path))
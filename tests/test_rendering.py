@@ -0,0 +1,58 @@
+import json
+import re
+
+from plotly.graph_objects import Figure, Scatter
+
+import rendering
+
+
+def figure_data(htmlcode: str) -> dict:
+    return json.loads(re.search(r"Plotly\.newPlot\(\"[\w-]+\", (.*), \{\"displaylogo\"", htmlcode).group(1))
+
+
+def test_interactive_figures_keep_significant_digits():
+    figure = Figure(
+        Scatter(
+            x=["2024-01-02 09:30:00.123456789", "2024-01-02 09:31:00"],
+            y=[0.000012345678, 1234.56789012],
+            customdata=[0.1 + 0.2, -0.5],
+        )
+    )
+
+    data = figure_data(rendering.figure_to_html_div(figure, 800, 600))["data"][0]
+
+    assert data["y"] == [1.23457e-05, 1234.57]
+    assert data["customdata"] == [0.3, -0.5]
+    # strings are not numbers, timestamps keep their fraction of a second
+    assert data["x"][0] == "2024-01-02 09:30:00.123456789"
+
+
+class ScopeStub:
+    def transform(self, figure_dict, format, width, height):
+        return b"scope"
+
+
+class ExportingFigure(Figure):
+    """A figure class with its own image export, as a themed subclass might have."""
+
+    def to_image(self, *args, **kwargs):
+        return b"own export"
+
+
+def test_figures_with_their_own_export_are_rendered_through_it():
+    renderer = rendering.Renderer(pool_size=0)
+    renderer._scopes.put(ScopeStub())
+
+    assert renderer.render(Figure(), 800, 600).image == b"scope"
+    assert renderer.render(ExportingFigure(), 800, 600).image == b"own export"
+
+
+def test_a_batch_is_rendered_in_order_with_each_figure_timed(caplog):
+    renderer = rendering.Renderer(pool_size=0)
+    renderer._scopes.put(ScopeStub())
+
+    with caplog.at_level("INFO"):
+        results = renderer.render_many([Figure(), ExportingFigure(), Figure()], 800, 600)
+
+    assert [result.image for result in results] == [b"scope", b"own export", b"scope"]
+    assert "Rendered 3 figures in" in caplog.text
@@ -0,0 +1,80 @@
+import pytest
+
+import serve
+from serve import Server
+
+
+class FakeWriter:
+    def __init__(self, content_hash):
+        self.hash = content_hash
+
+    def content_hash(self):
+        return self.hash
+
+
+class FakeReport:
+    """Report of one type with the tabs it would have written, placeholders noted in incomplete."""
+
+    def __init__(self, report_type, deadline, content, incomplete):
+        self.report_type = report_type
+        self.deadline = deadline
+        self.writer = FakeWriter(content)
+        self.incomplete = incomplete
+        self.pool = None
+
+    def process(self):
+        pass
+
+    def save_to_html(self):
+        return f"{self.report_type}.html"
+
+
+@pytest.fixture
+def server(monkeypatch):
+    built, sent, saved = [], [], []
+    contents = {"Normal": ("normal", []), "GEX": ("gex with a placeholder", ["SPY"])}
+
+    def build_report(report_type, tickers, multiprocessing, deadline, **options):
+        built.append(FakeReport(report_type, deadline, *contents[report_type]))
+        return built[-1]
+
+    monkeypatch.setattr(serve, "build_report", build_report)
+    monkeypatch.setattr(serve, "report_tickers", lambda report_type: ["SPY"])
+    monkeypatch.setattr(serve, "send_report", lambda full_file_name, layout: sent.append(full_file_name))
+    monkeypatch.setattr(serve, "save_state", lambda state: saved.append(dict(state)))
+    monkeypatch.setattr(serve, "load_state", lambda: {})
+    server = Server(["Normal", "GEX"], send=True, output="interactive", layout="single", deadline=60.0)
+    # a pool is never started for the fake reports
+    server.pool = object()
+    return server, built, sent, saved
+
+
+def test_reports_with_placeholders_are_not_sent(server):
+    server, built, sent, saved = server
+
+    server.run_cycle()
+
+    assert sent == ["Normal.html"]
+    assert saved == [{"Normal": "normal"}]
+
+
+def test_each_report_gets_a_share_of_what_is_left_of_the_cycle(server):
+    server, built, sent, saved = server
+
+    server.run_cycle()
+
+    assert [report.report_type for report in built] == ["Normal", "GEX"]
+    assert built[0].deadline == pytest.approx(30.0, abs=1.0)
+    # the first report took no time, the second gets all of what is left
+    assert built[1].deadline == pytest.approx(60.0, abs=1.0)
+
+
+def test_state_is_only_kept_for_reports_sent(server):
+    server, built, sent, saved = server
+    server.send = False
+
+    server.run_cycle()
+
+    assert sent == []
+    assert saved == []
+    assert server.state == {}
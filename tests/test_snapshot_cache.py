@@ -0,0 +1,22 @@
+import os
+
+import pandas as pd
+
+from snapshot_cache import SnapshotCache
+
+
+def test_a_snapshot_evicted_after_its_read_is_still_returned(tmp_path, monkeypatch):
+    cache = SnapshotCache(directory=str(tmp_path))
+    frame = pd.DataFrame({"price": [1.0]})
+    cache.put(frame, "SPY", "price", now=0.0)
+    read_parquet = pd.read_parquet
+
+    def read_then_evict(path):
+        read = read_parquet(path)
+        os.remove(path)
+        return read
+
+    monkeypatch.setattr(pd, "read_parquet", read_then_evict)
+
+    pd.testing.assert_frame_equal(cache.get("SPY", "price", now=0.0), frame)
+    assert cache.get("SPY", "price", now=0.0) is None
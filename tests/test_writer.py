@@ -0,0 +1,17 @@
+from plotly.graph_objects import Figure, Scatter
+
+import rendering
+from reports.writer import ReportWriter
+
+
+def write_report(path) -> str:
+    figure = Figure(Scatter(x=[1, 2, 3], y=[0.5, 0.25, 0.125]))
+    writer = ReportWriter(path)
+    writer.open("")
+    writer.add_tab("SPY", rendering.figure_to_html_div(figure, 800, 600))
+    writer.close()
+    return writer.content_hash()
+
+
+def test_interactive_reports_of_unchanged_charts_hash_the_same(tmp_path):
+    assert write_report(tmp_path / "first.html") == write_report(tmp_path / "second.html")